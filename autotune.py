@@ -0,0 +1,125 @@
+# autotune.py：在 (v_length, λ, group_size) 网格上自动选择模型配置
+#
+# 每个候选用同一份训练池的前 λ 轮训练，在留出样本上测稳态吞吐量，
+# 记录训练时间与模型字节数，然后在满足预算的候选中取 Pareto 最优。
+# 候选只保留配置与测量值（测完即释放模型），最后用同一份训练池重新训练选中的配置。
+
+import math
+import random
+import time
+
+import step1
+import sorter
+
+
+def default_grid(n):
+    base_lambda = math.ceil(math.log2(n))
+    v_lengths = sorted({max(2, n // 4), max(2, n // 2), n, 2 * n})
+    lambdas = sorted({max(1, base_lambda // 2), base_lambda, 2 * base_lambda})
+    group_sizes = [1, 2, 4]
+    return v_lengths, lambdas, group_sizes
+
+def measure_throughput(model, samples):
+    """
+    在留出样本上测稳态吞吐量（元素/秒）
+    """
+    total = 0
+    start = time.perf_counter()
+    for data in samples:
+        sorter.self_improving_sort(data, model)
+        total += len(data)
+    elapsed = time.perf_counter() - start
+    return total / max(elapsed, 1e-9)
+
+def pareto_front(candidates):
+    """
+    吞吐量越大越好，模型字节数与训练时间越小越好；返回不被任何候选支配的集合
+    """
+    def dominates(a, b):
+        no_worse = (a["throughput"] >= b["throughput"]
+                    and a["model_bytes"] <= b["model_bytes"]
+                    and a["train_time"] <= b["train_time"])
+        better = (a["throughput"] > b["throughput"]
+                  or a["model_bytes"] < b["model_bytes"]
+                  or a["train_time"] < b["train_time"])
+        return no_worse and better
+
+    return [c for c in candidates if not any(dominates(o, c) for o in candidates if o is not c)]
+
+def autotune(n, dist_type="piecewise", v_lengths=None, lambdas=None, group_sizes=None,
+             holdout=5, memory_budget=None, time_budget=None, seed=None):
+    """
+    输入：
+    - n: 输入长度
+    - v_lengths / lambdas / group_sizes: 搜索网格（默认见 default_grid）
+    - holdout: 留出样本数
+    - memory_budget: 模型字节数上限（None 表示不限）
+    - time_budget: 训练时间上限，秒（None 表示不限）
+
+    输出：
+    - model: 选中的模型，meta 中写入所选配置及其测量值
+    - candidates: 全部候选的测量结果（不含模型本身）
+    """
+    grid = default_grid(n)
+    v_lengths = v_lengths or grid[0]
+    lambdas = lambdas or grid[1]
+    group_sizes = group_sizes or grid[2]
+
+    if seed is not None:
+        random.seed(seed)
+    pool = step1.collect_training_data(n, max(lambdas), dist_type)
+    samples = [step1.generate_input(n, dist_type) for _ in range(holdout)]
+
+    candidates = []
+    for lambda_rounds in lambdas:
+        for v_length in v_lengths:
+            for group_size in group_sizes:
+                start = time.perf_counter()
+                model = sorter.train_model(pool[:lambda_rounds], v_length, group_size)
+                train_time = time.perf_counter() - start
+                candidates.append({
+                    "v_length": v_length,
+                    "lambda_rounds": lambda_rounds,
+                    "group_size": group_size,
+                    "train_time": train_time,
+                    "model_bytes": sorter.model_bytes(model),
+                    "throughput": measure_throughput(model, samples),
+                })
+                del model  # 同一时刻只保留一个候选模型
+
+    feasible = [c for c in candidates
+                if (memory_budget is None or c["model_bytes"] <= memory_budget)
+                and (time_budget is None or c["train_time"] <= time_budget)]
+    if not feasible:
+        raise ValueError("No configuration fits the given memory/time budget")
+
+    front = pareto_front(feasible)
+    best = max(front, key=lambda c: (c["throughput"], -c["model_bytes"], -c["train_time"]))
+
+    # 训练是确定性的：同一份训练池、同一配置得到相同的模型
+    model = sorter.train_model(pool[:best["lambda_rounds"]], best["v_length"], best["group_size"])
+    model["meta"].update({
+        "autotuned": True,
+        "dist_type": dist_type,
+        "throughput": best["throughput"],
+        "model_bytes": best["model_bytes"],
+        "train_time": best["train_time"],
+        "memory_budget": memory_budget,
+        "time_budget": time_budget,
+        "pareto_front": front,
+    })
+    return model, candidates
+
+
+if __name__ == "__main__":
+    n = 500
+    model, candidates = autotune(n, memory_budget=None, seed=42)
+    print(f"{'v_length':<10} {'λ':<5} {'group':<7} {'吞吐(元素/秒)':<16} {'模型(KB)':<12} {'训练(秒)':<10}")
+    print("-" * 64)
+    for c in candidates:
+        print(f"{c['v_length']:<10} {c['lambda_rounds']:<5} {c['group_size']:<7} "
+              f"{c['throughput']:<16.0f} {c['model_bytes'] / 1024:<12.1f} {c['train_time']:<10.4f}")
+
+    meta = model["meta"]
+    print(f"\n选中配置：v_length={meta['v_length']}, λ={meta['lambda_rounds']}, group_size={meta['group_size']}")
+    sorter.save_model(model, "model.pkl")
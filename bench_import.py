@@ -0,0 +1,46 @@
+# bench_import.py：核心排序模块的导入时间基准
+#
+# 核心流程（step1–step5 + sorter / query / checkpoint / autotune）只允许依赖 NumPy，
+# 绘图（plotting.py）和实验脚本（images.py、debug.py）只在调用时才导入。
+# 本脚本在全新的子进程里导入核心模块，检查导入时间预算，并确认没有拉进绘图库。
+
+import statistics
+import subprocess
+import sys
+
+CORE_MODULES = ["step1", "step2", "step3", "step4", "step5",
+                "sorter", "query", "checkpoint", "autotune", "utils"]
+FORBIDDEN = ["matplotlib", "seaborn", "pandas"]
+IMPORT_BUDGET = 0.5  # 秒
+
+PROBE = """
+import sys, time
+t0 = time.perf_counter()
+import {modules}
+elapsed = time.perf_counter() - t0
+loaded = [m for m in {forbidden!r} if m in sys.modules]
+print(elapsed)
+print(",".join(loaded))
+"""
+
+def measure_import(modules=CORE_MODULES, runs=5):
+    code = PROBE.format(modules=", ".join(modules), forbidden=FORBIDDEN)
+    times, loaded = [], set()
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        elapsed, names = out.stdout.split("\n")[:2]
+        times.append(float(elapsed))
+        loaded.update(n for n in names.split(",") if n)
+    return statistics.median(times), sorted(loaded)
+
+
+if __name__ == "__main__":
+    median, loaded = measure_import()
+    print(f"核心模块导入时间（中位数）：{median * 1000:.1f} ms，预算 {IMPORT_BUDGET * 1000:.0f} ms")
+    if loaded:
+        print("❌ 核心导入路径拉进了绘图库:", ", ".join(loaded))
+        sys.exit(1)
+    if median > IMPORT_BUDGET:
+        print("❌ 超出导入时间预算")
+        sys.exit(1)
+    print("✓ 核心导入路径只依赖 NumPy")
@@ -0,0 +1,189 @@
+# checkpoint.py：可断点续训、可按位置区间分片的训练流程
+#
+# 检查点目录结构：
+#  ├─ meta.json                       (n, λ, v_length, group_size, dist_type)
+#  ├─ training_data.npy               (Step 1 采样数据，λ × n)
+#  ├─ v_list.npy                      (Step 2 V-list，含 ±inf 哨兵)
+#  ├─ freq.npz                        (Step 3 稀疏频数，CSR：indptr / indices / counts)
+#  └─ trees/shard_<start>_<end>.pkl   (Step 4 已完成的 Di 树分片，按树下标区间)
+#
+# 每个产物都先写临时文件再 os.replace，进程崩溃不会留下半个文件；
+# 重启时已存在的产物直接跳过。多机训练时先在一台机器上 prepare，
+# 再把目录分发出去，各机器用 build_shards 处理不同的区间，最后 merge_shards。
+# 分片的覆盖范围由已有分片文件名推出：build_shards 只补缺口（shard_size 可以与上次不同），
+# 分片之间允许重叠（同一位置的树总是相同的），merge_shards 只取每个位置的第一份。
+
+import json
+import math
+import os
+import pickle
+
+import numpy as np
+
+import step1, step2, step3, step4
+
+
+def atomic_write(path, write_fn):
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        write_fn(f)
+    os.replace(tmp, path)
+
+def load_meta(ckpt_dir):
+    with open(os.path.join(ckpt_dir, "meta.json")) as f:
+        return json.load(f)
+
+def num_tree_rows(meta):
+    return math.ceil(meta["n"] / meta["group_size"])
+
+# --- Step 1–3：采样、V-list、稀疏频数 ---
+def prepare(ckpt_dir, n, lambda_rounds=None, dist_type="piecewise", v_length=None, group_size=1):
+    os.makedirs(os.path.join(ckpt_dir, "trees"), exist_ok=True)
+    if lambda_rounds is None:
+        lambda_rounds = math.ceil(math.log2(n))
+    if v_length is None:
+        v_length = n
+
+    meta_path = os.path.join(ckpt_dir, "meta.json")
+    if os.path.exists(meta_path):
+        meta = load_meta(ckpt_dir)
+        if (meta["n"], meta["lambda_rounds"], meta["v_length"], meta["group_size"], meta["dist_type"]) != \
+                (n, lambda_rounds, v_length, group_size, dist_type):
+            raise ValueError("Checkpoint directory was created with a different configuration")
+    else:
+        meta = {"n": n, "lambda_rounds": lambda_rounds, "v_length": v_length,
+                "group_size": group_size, "dist_type": dist_type}
+        atomic_write(meta_path, lambda f: f.write(json.dumps(meta).encode()))
+
+    data_path = os.path.join(ckpt_dir, "training_data.npy")
+    if os.path.exists(data_path):
+        training_data = np.load(data_path).tolist()
+    else:
+        training_data = step1.collect_training_data(n, lambda_rounds, dist_type)
+        atomic_write(data_path, lambda f: np.save(f, np.array(training_data)))
+
+    v_path = os.path.join(ckpt_dir, "v_list.npy")
+    if os.path.exists(v_path):
+        v_list = np.load(v_path).tolist()
+    else:
+        v_list = step2.build_v_list(training_data, v_length)
+        atomic_write(v_path, lambda f: np.save(f, np.array(v_list)))
+
+    freq_path = os.path.join(ckpt_dir, "freq.npz")
+    if not os.path.exists(freq_path):
+        freq_matrix, _ = step3.estimate_distributions(training_data, v_list, n)
+        freq = np.asarray(freq_matrix, dtype=np.uint16)
+        rows, cols = np.nonzero(freq)
+        indptr = np.concatenate(([0], np.cumsum(np.bincount(rows, minlength=n))))
+        atomic_write(freq_path, lambda f: np.savez(f, indptr=indptr, indices=cols.astype(np.int32),
+                                                    counts=freq[rows, cols],
+                                                    num_intervals=freq.shape[1]))
+    return meta
+
+def load_prob_rows(ckpt_dir, meta, start, end):
+    """
+    由稀疏频数恢复位置 [start, end) 的稠密概率矩阵（float32，与 step3 一致）
+    """
+    freq = np.load(os.path.join(ckpt_dir, "freq.npz"))
+    indptr, indices, counts = freq["indptr"], freq["indices"], freq["counts"]
+    prob = np.zeros((end - start, int(freq["num_intervals"])), dtype=np.float32)
+    for i in range(start, end):
+        lo, hi = indptr[i], indptr[i + 1]
+        prob[i - start, indices[lo:hi]] = counts[lo:hi]
+    return prob / meta["lambda_rounds"]
+
+# --- Step 4：按树下标区间分片构树 ---
+def shard_path(ckpt_dir, start, end):
+    return os.path.join(ckpt_dir, "trees", f"shard_{start:010d}_{end:010d}.pkl")
+
+def list_shards(ckpt_dir):
+    shards = []
+    for name in os.listdir(os.path.join(ckpt_dir, "trees")):
+        if name.startswith("shard_") and name.endswith(".pkl"):
+            s, e = name[len("shard_"):-len(".pkl")].split("_")
+            shards.append((int(s), int(e), name))
+    return sorted(shards)
+
+def missing_ranges(shards, start, end):
+    """
+    返回 [start, end) 中没有被任何分片覆盖的区间列表
+    """
+    gaps = []
+    pos = start
+    for s, e, _ in shards:
+        if s > pos:
+            gaps.append((pos, min(s, end)))
+        pos = max(pos, e)
+        if pos >= end:
+            break
+    if pos < end:
+        gaps.append((pos, end))
+    return [(s, e) for s, e in gaps if s < e]
+
+def build_shards(ckpt_dir, start=0, end=None, shard_size=1000):
+    """
+    构建树下标 [start, end) 内尚未被已有分片覆盖的部分，返回本次新构建的分片数
+    """
+    meta = load_meta(ckpt_dir)
+    rows = num_tree_rows(meta)
+    end = rows if end is None else min(end, rows)
+    g = meta["group_size"]
+
+    built = 0
+    for gap_start, gap_end in missing_ranges(list_shards(ckpt_dir), start, end):
+        for s in range(gap_start, gap_end, shard_size):
+            e = min(s + shard_size, gap_end)
+            prob = load_prob_rows(ckpt_dir, meta, s * g, min(e * g, meta["n"]))
+            prob_matrix = step3.group_distributions(prob.tolist(), g)
+            trees = step4.build_all_di_trees(prob_matrix)
+            atomic_write(shard_path(ckpt_dir, s, e),
+                         lambda f: pickle.dump(trees, f, protocol=pickle.HIGHEST_PROTOCOL))
+            built += 1
+    return built
+
+# --- 合并 ---
+def merge_shards(ckpt_dir):
+    """
+    按区间顺序拼接全部分片（重叠部分只取一份），检查覆盖完整后返回 sorter 格式的模型
+    """
+    meta = load_meta(ckpt_dir)
+    rows = num_tree_rows(meta)
+
+    di_trees = []
+    for s, e, name in list_shards(ckpt_dir):
+        if e <= len(di_trees):
+            continue  # 已被前面的分片完全覆盖
+        if s > len(di_trees):
+            raise ValueError(f"Tree shards are not contiguous at position {len(di_trees)}")
+        with open(os.path.join(ckpt_dir, "trees", name), "rb") as f:
+            di_trees.extend(pickle.load(f)[len(di_trees) - s:])
+    if len(di_trees) != rows:
+        raise ValueError(f"Missing trees for positions {len(di_trees)}..{rows}")
+
+    v_list = np.load(os.path.join(ckpt_dir, "v_list.npy")).tolist()
+    model_meta = {k: meta[k] for k in ("n", "v_length", "lambda_rounds", "group_size")}
+    model_meta["lazy"] = False
+    model_meta["mode"] = "trees"
+    return {"v_list": v_list, "di_trees": di_trees, "group_size": meta["group_size"], "mode": "trees",
+            "meta": model_meta}
+
+def train_checkpointed(n, ckpt_dir, lambda_rounds=None, dist_type="piecewise", v_length=None,
+                       group_size=1, shard_size=1000):
+    prepare(ckpt_dir, n, lambda_rounds, dist_type, v_length, group_size)
+    build_shards(ckpt_dir, shard_size=shard_size)
+    return merge_shards(ckpt_dir)
+
+
+if __name__ == "__main__":
+    import sorter
+
+    n = 2000
+    ckpt_dir = "checkpoints/n2000"
+    prepare(ckpt_dir, n)
+    # 模拟两台机器分别处理前后两半，再合并
+    build_shards(ckpt_dir, 0, n // 2, shard_size=250)
+    build_shards(ckpt_dir, n // 2, n, shard_size=250)
+    model = merge_shards(ckpt_dir)
+
+    data = step1.generate_input(n)
+    print("排序正确:", sorter.self_improving_sort(data, model) == sorted(data))
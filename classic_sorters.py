@@ -1,48 +1,170 @@
-def insertion_sort(arr):
-    arr = arr.copy()
-    for i in range(1, len(arr)):
-        key = arr[i]
+# classic_sorters.py：对照组排序算法与统一注册表
+#
+# 手写实现全部原地、非递归：快速排序用三数取中 + 显式栈（先处理较短一侧，栈深 O(log n)），
+# 归并排序自底向上、只用一块辅助缓冲区，堆排序原地下滤。每个函数对 arr 原地排序并返回 arr。
+# 基准脚本（step6 / step7 / images）都从 BASELINES 取对照组。
+
+import math
+
+import numpy as np
+
+INSERTION_CUTOFF = 16  # 小区间改用插入排序
+
+def insertion_sort(arr, lo=0, hi=None, key=None, budget=None):
+    """
+    对 arr[lo:hi] 原地稳定排序并返回 arr。
+    - key: 按 key(元素) 比较，例如按 keys 排序下标数组时传 keys.__getitem__
+    - budget: 元素移动次数上限；给出时改为返回剩余预算，耗尽时立即停止并返回负数
+      （此时 arr 仍是原元素的一个排列，相等元素的相对顺序不变）
+    """
+    if hi is None:
+        hi = len(arr)
+    remaining = math.inf if budget is None else budget
+    for i in range(lo + 1, hi):
+        item = arr[i]
+        item_key = item if key is None else key(item)
         j = i - 1
-        while j >= 0 and arr[j] > key:
+        while j >= lo and (arr[j] if key is None else key(arr[j])) > item_key:
             arr[j + 1] = arr[j]
             j -= 1
-        arr[j + 1] = key
-    return arr
+            remaining -= 1
+            if remaining < 0:
+                arr[j + 1] = item
+                return remaining
+        arr[j + 1] = item
+    return arr if budget is None else remaining
 
 def quicksort(arr):
-    arr = arr.copy()
-    if len(arr) <= 1:
-        return arr
-    pivot = arr[0]
-    left = [x for x in arr[1:] if x < pivot]
-    right = [x for x in arr[1:] if x >= pivot]
-    return quicksort(left) + [pivot] + quicksort(right)
+    stack = [(0, len(arr))]
+    while stack:
+        lo, hi = stack.pop()
+        while hi - lo > INSERTION_CUTOFF:
+            mid = (lo + hi - 1) // 2
+            a, b, c = arr[lo], arr[mid], arr[hi - 1]
+            if a > b:
+                a, b = b, a
+            pivot = b if b <= c else max(a, c)  # 三数取中，已排序/逆序输入不会退化
 
-def mergesort(arr):
-    arr = arr.copy()
-    if len(arr) <= 1:
-        return arr
-    mid = len(arr) // 2
-    left = mergesort(arr[:mid])
-    right = mergesort(arr[mid:])
-    return merge(left, right)
-
-def merge(left, right):
-    result = []
-    i = j = 0
-    while i < len(left) and j < len(right):
-        if left[i] <= right[j]:
-            result.append(left[i])
+            i, j = lo, hi - 1
+            while i <= j:
+                while arr[i] < pivot:
+                    i += 1
+                while arr[j] > pivot:
+                    j -= 1
+                if i <= j:
+                    arr[i], arr[j] = arr[j], arr[i]
+                    i += 1
+                    j -= 1
+
+            # 较长一侧入栈，继续处理较短一侧
+            if j + 1 - lo < hi - i:
+                stack.append((i, hi))
+                hi = j + 1
+            else:
+                stack.append((lo, j + 1))
+                lo = i
+        insertion_sort(arr, lo, hi)
+    return arr
+
+def merge(src, dst, lo, mid, hi):
+    # 把 src[lo:mid] 与 src[mid:hi] 稳定地归并到 dst[lo:hi]
+    i, j = lo, mid
+    for k in range(lo, hi):
+        if i < mid and (j >= hi or src[i] <= src[j]):
+            dst[k] = src[i]
             i += 1
         else:
-            result.append(right[j])
+            dst[k] = src[j]
             j += 1
-    result.extend(left[i:])
-    result.extend(right[j:])
-    return result
 
-import heapq
+def mergesort(arr):
+    n = len(arr)
+    for s in range(0, n, INSERTION_CUTOFF):
+        insertion_sort(arr, s, min(s + INSERTION_CUTOFF, n))
+
+    src, dst = arr, arr.copy()
+    width = INSERTION_CUTOFF
+    while width < n:
+        for lo in range(0, n, 2 * width):
+            mid = min(lo + width, n)
+            hi = min(lo + 2 * width, n)
+            merge(src, dst, lo, mid, hi)
+        src, dst = dst, src
+        width *= 2
+    if src is not arr:
+        arr[:] = src
+    return arr
+
+def sift_down(arr, root, end):
+    item = arr[root]
+    child = 2 * root + 1
+    while child < end:
+        if child + 1 < end and arr[child + 1] > arr[child]:
+            child += 1
+        if arr[child] <= item:
+            break
+        arr[root] = arr[child]
+        root = child
+        child = 2 * root + 1
+    arr[root] = item
+
 def heapsort(arr):
-    arr = arr.copy()
-    heapq.heapify(arr)
-    return [heapq.heappop(arr) for _ in range(len(arr))]
+    n = len(arr)
+    for root in range(n // 2 - 1, -1, -1):
+        sift_down(arr, root, n)
+    for end in range(n - 1, 0, -1):
+        arr[0], arr[end] = arr[end], arr[0]
+        sift_down(arr, 0, end)
+    return arr
+
+def python_sorted(arr):
+    arr.sort()
+    return arr
+
+def numpy_sort(kind):
+    def sort(arr):
+        if isinstance(arr, np.ndarray):
+            arr.sort(kind=kind)
+            return arr
+        return np.sort(np.asarray(arr, dtype=np.float64), kind=kind)
+    sort.__name__ = f"numpy_{kind}"
+    return sort
+
+# --- 对照组注册表 ---
+BASELINES = {
+    "quicksort": quicksort,
+    "mergesort": mergesort,
+    "heapsort": heapsort,
+    "insertion_sort": insertion_sort,
+    "python_sorted": python_sorted,
+    "numpy_quicksort": numpy_sort("quicksort"),
+    "numpy_mergesort": numpy_sort("mergesort"),
+    "numpy_heapsort": numpy_sort("heapsort"),
+}
+
+QUADRATIC = {"insertion_sort"}  # 只适合小 n
+
+def get_baselines(names=None, include_quadratic=False):
+    """
+    按名字取对照组（默认全部，且不含 O(n²) 的插入排序）；返回 [(name, func)]
+    """
+    if names is None:
+        names = [name for name in BASELINES if include_quadratic or name not in QUADRATIC]
+    return [(name, BASELINES[name]) for name in names]
+
+
+if __name__ == "__main__":
+    import random
+
+    for n in [0, 1, 2, 17, 1000]:
+        inputs = {
+            "random": [random.random() for _ in range(n)],
+            "sorted": list(range(n)),
+            "reversed": list(range(n, 0, -1)),
+            "duplicates": [random.randint(0, 3) for _ in range(n)],
+        }
+        for kind, data in inputs.items():
+            for name, func in get_baselines(include_quadratic=True):
+                result = func(data.copy())
+                assert list(result) == sorted(data), (name, kind, n)
+    print("✓ 所有对照组排序正确")
@@ -0,0 +1,121 @@
+# compact.py：紧凑模型存储（更小的 V-list 与 Di 树下标类型）
+#
+# - V-list：V-list 只是一组有序的分割点，只要换成 float32 后仍保持训练数据的区间归属，
+#   就直接用 float32 值作为新的分割点。分类时输入保持 float64，与 float32 边界比较时
+#   边界被精确提升为 float64，所以比较本身是精确的，桶就是 [v[k], v[k+1])，排序结果不变。
+#   不安全（相邻边界合并，或训练数据的区间归属改变）时保留 float64。
+# - Di 树：每棵树恰好有「区间数」个节点，按位置堆叠成 (树数 × 区间数) 的 split / left / right
+#   数组；下标类型按区间数选 uint16 / uint32 / int64，类型最大值（int64 时为 -1）表示空孩子。
+
+import numpy as np
+
+import step5
+
+
+def index_dtype(num_nodes):
+    # 需要为「空孩子」预留一个值
+    if num_nodes < np.iinfo(np.uint16).max:
+        return np.uint16, np.iinfo(np.uint16).max
+    if num_nodes < np.iinfo(np.uint32).max:
+        return np.uint32, np.iinfo(np.uint32).max
+    return np.int64, -1
+
+def compact_v_list(v_list, training_data=None):
+    """
+    返回 (V-list 数组, 是否降为 float32)
+    """
+    v64 = np.asarray(v_list, dtype=np.float64)
+    v32 = v64.astype(np.float32)
+    if np.any((np.diff(v64) > 0) & (np.diff(v32) <= 0)):
+        return v64, False  # 相邻边界在 float32 下合并
+
+    if training_data is not None:
+        data = np.asarray(training_data, dtype=np.float64)
+        exact = np.searchsorted(v64, data, side="right")
+        narrow = np.searchsorted(v32.astype(np.float64), data, side="right")
+        if not np.array_equal(exact, narrow):
+            return v64, False  # 有训练样本落在边界的舍入误差之内
+    return v32, True
+
+def pack_trees_2d(di_trees):
+    num_trees = len(di_trees)
+    num_nodes = max(len(di_trees[t]) for t in range(num_trees))
+    dtype, none = index_dtype(num_nodes)
+    split = np.zeros((num_trees, num_nodes), dtype=dtype)
+    left = np.full((num_trees, num_nodes), none, dtype=dtype)
+    right = np.full((num_trees, num_nodes), none, dtype=dtype)
+
+    for t in range(num_trees):
+        for j, (split_index, left_idx, right_idx) in enumerate(di_trees[t]):
+            split[t, j] = split_index
+            if left_idx is not None:
+                left[t, j] = left_idx
+            if right_idx is not None:
+                right[t, j] = right_idx
+    return (split, left, right), none
+
+def compact_model(model, training_data=None):
+    """
+    把 sorter 模型转换为紧凑模型；training_data 用于检查 float32 V-list 是否安全
+    """
+    if model.get("key_dtype") == "int64":
+        raise ValueError("int64 models already store their V-list and trees as arrays")
+
+    v_list, narrowed = compact_v_list(model["v_list"], training_data)
+    trees, none = (None, None) if model.get("di_trees") is None else pack_trees_2d(model["di_trees"])
+
+    meta = dict(model["meta"])
+    meta.update({
+        "compact": True,
+        "v_list_dtype": str(v_list.dtype),
+        "tree_index_dtype": None if trees is None else str(trees[0].dtype),
+        "lazy": False,
+    })
+    return {"v_list": v_list, "di_trees": None, "trees": trees, "tree_none": none,
+            "group_size": model["group_size"], "mode": model.get("mode", "trees"),
+            "compact": True, "narrowed": narrowed, "meta": meta}
+
+def bucket_ids(keys, model):
+    """
+    在紧凑树上按层同步向量化下行（支持一维或 (B, n) 输入），结果与 step5.locate_bucket 语义相同
+    """
+    v = model["v_list"]
+    if model["trees"] is None:
+        return step5.bucket_ids_global(keys, v)
+
+    split, left, right = model["trees"]
+    none = model["tree_none"]
+    keys = np.asarray(keys, dtype=np.float64)
+    n = keys.shape[-1]
+    x = keys.ravel()
+    tree = np.tile(np.arange(n) // model["group_size"], x.size // max(n, 1))
+
+    k = np.zeros(x.size, dtype=np.int64)
+    active = np.arange(x.size)
+    node = np.zeros(x.size, dtype=np.int64)
+    while active.size:
+        t = tree[active]
+        s = split[t, node].astype(np.int64)
+        go_left = x[active] < v[s]  # float32 边界提升为 float64 后精确比较
+        k[active[~go_left]] = s[~go_left]
+        nxt = np.where(go_left, left[t, node], right[t, node])
+        keep = nxt != none
+        active, node = active[keep], nxt[keep].astype(np.int64)
+
+    return np.clip(k, 0, len(v) - 2).reshape(keys.shape)
+
+
+if __name__ == "__main__":
+    import step1
+    import sorter
+
+    n = 1000
+    training_data = step1.collect_training_data(n)
+    model = sorter.train_model(training_data)
+    small = compact_model(model, training_data)
+
+    data = step1.generate_input(n)
+    print(f"V-list dtype: {small['meta']['v_list_dtype']}，树下标 dtype: {small['meta']['tree_index_dtype']}")
+    print("桶号一致:", np.array_equal(bucket_ids(data, small), sorter.bucket_ids(data, model)))
+    print("排序正确:", sorter.self_improving_sort(data, small) == sorted(data))
+    print(f"模型大小：{sorter.model_bytes(model) / 1024:.1f} KB → {sorter.model_bytes(small) / 1024:.1f} KB")
@@ -6,10 +6,11 @@ import step2
 import step3
 import step4
 import step5
-from utils import generate_input, plot_heatmap
+from diagnostics import BucketDiagnostics, check_v_list, tree_depth_stats
+from utils import generate_input
 
 
-def debug_bucket_flow(n=2000, dist_type="piecewise", lambda_rounds=10):
+def debug_bucket_flow(n=2000, dist_type="piecewise", lambda_rounds=10, plot=False):
     print("\n[🔍 Step 1] 采集训练数据")
     training_data = [generate_input(n, dist_type) for _ in range(lambda_rounds)]
     print("[✓] 训练组数:", len(training_data))
@@ -18,12 +19,16 @@ def debug_bucket_flow(n=2000, dist_type="piecewise", lambda_rounds=10):
     print("\n[🔍 Step 2] 构建 V-list")
     v_list = step2.build_v_list(training_data, v_length=n)
     print("[✓] V-list 长度:", len(v_list))
-    print("[✓] 是否递增:", all(v_list[i] < v_list[i+1] for i in range(len(v_list)-1)))
+    v_check = check_v_list(v_list)
+    print("[✓] 是否递增:", v_check["monotonic"])
+    print("[✓] 重复边界数:", v_check["duplicate_boundaries"])
 
     print("\n[🔍 Step 3] 概率估计 + Step 4 构建 Di 树")
     _, prob_matrix = step3.estimate_distributions(training_data, v_list, n)
     di_trees = step4.build_all_di_trees(prob_matrix)
     print("[✓] Di 树数量:", len(di_trees))
+    depth = tree_depth_stats(di_trees)
+    print("[✓] 树深度 最大/平均:", f"{depth['max_depth']['max']} / {depth['mean_depth']['mean']:.2f}")
 
     print("\n[🔍 Step 5] 桶划分")
     test_data = generate_input(n, dist_type)
@@ -34,17 +39,22 @@ def debug_bucket_flow(n=2000, dist_type="piecewise", lambda_rounds=10):
     else:
         print("[✓] Di 树与测试数据一一对应")
 
-    buckets = step5.bucket_classify(test_data, di_trees, v_list)
-    bucket_sizes = [len(b) for b in buckets]
-    print("[✓] 总桶数:", len(bucket_sizes))
-    print("[✓] 最大桶大小:", max(bucket_sizes))
-    print("[✓] 非空桶数:", sum(1 for x in bucket_sizes if x > 0))
-    print("[✓] 均值/标准差:", f"{np.mean(bucket_sizes):.2f} / {np.std(bucket_sizes):.2f}")
+    # 只生成桶号数组，统计由 BucketDiagnostics 流式完成，不物化桶
+    ids = step5.bucket_ids(test_data, di_trees, v_list)
+    diag = BucketDiagnostics(len(v_list) - 1)
+    diag.observe(ids)
+    report = diag.report()
+    print("[✓] 总桶数:", report["num_buckets"])
+    print("[✓] 最大桶大小:", report["max_bucket"]["max"])
+    print("[✓] 空桶比例:", f"{report['empty_ratio']['mean']:.2%}")
+    print("[✓] 占用标准差:", f"{report['occupancy_std']['mean']:.2f}")
 
-    heatmap_data = np.zeros((1, len(bucket_sizes)))
-    heatmap_data[0, :] = bucket_sizes
-    plot_heatmap(heatmap_data, title=f"Bucket Heatmap ({dist_type}, n={n})")
+    if plot:
+        from plotting import plot_heatmap  # 只在出图时才导入 matplotlib / seaborn
 
+        heatmap_data = np.bincount(ids, minlength=len(v_list) - 1)[np.newaxis, :]
+        plot_heatmap(heatmap_data, title=f"Bucket Heatmap ({dist_type}, n={n})")
+    return report
 
 if __name__ == "__main__":
-    debug_bucket_flow(n=2000, dist_type="piecewise", lambda_rounds=10)
\ No newline at end of file
+    debug_bucket_flow(n=2000, dist_type="piecewise", lambda_rounds=10, plot=True)
\ No newline at end of file
@@ -0,0 +1,185 @@
+# diagnostics.py：桶分布诊断（流式统计，不物化桶）
+#
+# 只消费桶号数组（sorter.bucket_ids / step5.bucket_ids 的输出），每次调用只保留
+# O(桶数) 的计数，跨调用的统计用 Welford 在线更新。报告是只含基本类型的 dict，
+# 可以直接 json.dumps 记日志，也可以用 diff_reports 比较两个模型。绘图是可选的。
+
+import math
+
+import numpy as np
+
+HIST_MAX = 32  # 桶占用直方图的最大格，更大的桶计入溢出格
+
+
+class RunningStats:
+    # Welford 在线均值/方差
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.max = -math.inf
+        self.min = math.inf
+
+    def add(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        self.max = max(self.max, x)
+        self.min = min(self.min, x)
+
+    def summary(self):
+        if self.count == 0:
+            return None
+        std = math.sqrt(self.m2 / self.count)
+        return {"count": self.count, "mean": self.mean, "std": std, "min": self.min, "max": self.max}
+
+
+class BucketDiagnostics:
+    """
+    用法：每个输入可分块调用 update(ids)，结束时调用 end_call()；
+    或者整段桶号直接 observe(ids)。report() 返回累计统计。
+    """
+
+    def __init__(self, num_buckets):
+        self.num_buckets = num_buckets
+        self.current = np.zeros(num_buckets, dtype=np.int64)
+        self.histogram = np.zeros(HIST_MAX + 2, dtype=np.int64)  # 最后一格为溢出
+        self.max_bucket = RunningStats()
+        self.empty_ratio = RunningStats()
+        self.occupancy_std = RunningStats()
+        self.insertion_cost = RunningStats()  # Σ c(c-1)/2：桶内插入排序的最坏比较次数
+
+    def update(self, ids):
+        self.current += np.bincount(np.asarray(ids).ravel(), minlength=self.num_buckets)
+
+    def end_call(self):
+        counts = self.current
+        self.histogram += np.bincount(np.minimum(counts, HIST_MAX + 1), minlength=HIST_MAX + 2)
+        self.max_bucket.add(int(counts.max()))
+        self.empty_ratio.add(float((counts == 0).mean()))
+        self.occupancy_std.add(float(counts.std()))
+        self.insertion_cost.add(float((counts * (counts - 1) // 2).sum()))
+        self.current = np.zeros(self.num_buckets, dtype=np.int64)
+
+    def observe(self, ids):
+        self.update(ids)
+        self.end_call()
+
+    def report(self):
+        return {
+            "num_buckets": self.num_buckets,
+            "calls": self.max_bucket.count,
+            "occupancy_histogram": self.histogram.tolist(),
+            "max_bucket": self.max_bucket.summary(),
+            "empty_ratio": self.empty_ratio.summary(),
+            "occupancy_std": self.occupancy_std.summary(),
+            "insertion_cost": self.insertion_cost.summary(),
+        }
+
+# --- V-list 检查 ---
+def has_sentinels(v):
+    # 浮点模型首尾为 -inf / +inf，int64 模型（intkeys）为 INT64_MIN / INT64_MAX
+    if v.size < 2:
+        return False
+    if np.issubdtype(v.dtype, np.integer):
+        info = np.iinfo(np.int64)
+        return bool(v[0] == info.min and v[-1] == info.max)
+    return bool(v[0] == -np.inf and v[-1] == np.inf)
+
+def check_v_list(v_list, max_examples=5):
+    v = np.asarray(v_list)
+    diff = np.diff(v)
+    decreasing = np.flatnonzero(diff < 0)
+    return {
+        "length": int(v.size),
+        "monotonic": bool(decreasing.size == 0),
+        "decreasing_at": decreasing[:max_examples].tolist(),
+        "duplicate_boundaries": int((diff == 0).sum()),  # 相邻相等 → 永远为空的区间
+        "sentinels": has_sentinels(v),
+    }
+
+# --- Di 树深度 ---
+def tree_depths(tree):
+    # 返回 (最大深度, 平均节点深度)；逐棵遍历，不保存中间结构
+    if not tree:
+        return 0, 0.0
+    total, deepest = 0, 0
+    stack = [(0, 1)]
+    while stack:
+        idx, depth = stack.pop()
+        total += depth
+        deepest = max(deepest, depth)
+        _, left_idx, right_idx = tree[idx]
+        if left_idx is not None:
+            stack.append((left_idx, depth + 1))
+        if right_idx is not None:
+            stack.append((right_idx, depth + 1))
+    return deepest, total / len(tree)
+
+def tree_depth_stats(di_trees, positions=None):
+    """
+    positions 为 None 时遍历全部树；对 LazyDiForest 可只传已缓存或抽样的位置
+    """
+    max_depth, mean_depth = RunningStats(), RunningStats()
+    for i in (range(len(di_trees)) if positions is None else positions):
+        deepest, mean = tree_depths(di_trees[i])
+        max_depth.add(deepest)
+        mean_depth.add(mean)
+    return {"max_depth": max_depth.summary(), "mean_depth": mean_depth.summary()}
+
+# --- 模型报告与比较 ---
+def model_report(model, positions=None):
+    report = {
+        "meta": {k: v for k, v in model["meta"].items() if isinstance(v, (int, float, str, bool))},
+        "v_list": check_v_list(model["v_list"]),
+    }
+    if model.get("di_trees") is not None:
+        report["trees"] = tree_depth_stats(model["di_trees"], positions)
+    return report
+
+def flatten(report, prefix=""):
+    flat = {}
+    for key, value in report.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + "."))
+        else:
+            flat[name] = value
+    return flat
+
+def diff_reports(a, b):
+    """
+    比较两份报告，返回 {字段: (a 的值, b 的值)}，只列出不同的字段
+    """
+    fa, fb = flatten(a), flatten(b)
+    return {k: (fa.get(k), fb.get(k)) for k in sorted(set(fa) | set(fb)) if fa.get(k) != fb.get(k)}
+
+def plot_report(report, title="Bucket Occupancy"):
+    from plotting import plot_bar_chart  # 只在出图时才导入 matplotlib / seaborn
+
+    hist = report["occupancy_histogram"]
+    labels = [str(i) for i in range(len(hist) - 1)] + [f">{len(hist) - 2}"]
+    plot_bar_chart(labels, hist, "Number of Buckets", title, rotation=0)
+
+
+if __name__ == "__main__":
+    import json
+
+    import step1
+    import sorter
+
+    n = 1000
+    model = sorter.train(n)
+    diag = BucketDiagnostics(len(model["v_list"]) - 1)
+    for _ in range(5):
+        data = step1.generate_input(n)
+        ids = sorter.bucket_ids(data, model)
+        for start in range(0, n, 250):  # 模拟分块到达的输入
+            diag.update(ids[start:start + 250])
+        diag.end_call()
+
+    print(json.dumps({"buckets": diag.report(), "model": model_report(model)}, indent=2, ensure_ascii=False))
+
+    other = sorter.train(n, v_length=n // 2)
+    print("模型差异:", diff_reports(model_report(model), model_report(other)))
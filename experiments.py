@@ -0,0 +1,154 @@
+# experiments.py：images.py 规模实验的并行、带缓存的运行器
+#
+# 每个 (n, 分布) 组合是一个独立的单元：训练（或从缓存加载）模型，再测稳态排序和对照组。
+#  ├─ <cache_dir>/models/n<n>_<dist>_l<λ>_s<seed>.pkl         (训练好的模型，meta 中带真实训练时间)
+#  └─ <cache_dir>/results/n<n>_<dist>_l<λ>_s<seed>_r<runs>.json  (该单元的测量结果)
+# 已有结果的单元直接读取，所以整套图可以增量重跑。缺失的单元先在进程池里并行训练（只写模型缓存），
+# 计时阶段再在当前进程中串行执行，测量不受其它进程争用 CPU / 内存带宽的影响。
+
+import json
+import math
+import os
+import random
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+import step1
+import sorter
+from classic_sorters import BASELINES
+
+# 图表里的算法名 → 排序函数（对照组都原地排序，调用方负责传入副本）
+# 除手写实现外也包含 C 实现的 list.sort 与 np.sort，盈亏平衡按其中最快的一个计算
+ALGORITHMS = {
+    "QuickSort": BASELINES["quicksort"],
+    "MergeSort": BASELINES["mergesort"],
+    "HeapSort":  BASELINES["heapsort"],
+    "Python sorted": BASELINES["python_sorted"],
+    "NumPy quicksort": BASELINES["numpy_quicksort"],
+    "NumPy mergesort": BASELINES["numpy_mergesort"],
+    "NumPy heapsort": BASELINES["numpy_heapsort"],
+}
+SELF_IMPROVING = "Self‑Improving"
+
+
+def timed(fn):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    out = fn()
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak/1024, out   # peak KB
+
+def cell_name(n, dist_type, lambda_rounds, seed):
+    return f"n{n}_{dist_type}_l{lambda_rounds}_s{seed}"
+
+def load_or_train(n, dist_type, lambda_rounds, seed, cache_dir):
+    """
+    从缓存加载模型；没有则训练并记录训练时间（不含采样）后写入缓存。
+    训练时间用 time.process_time()：训练是单线程的，串行时与墙钟时间一致，
+    在进程池里并行训练时也不会把等待其它进程的时间算进来
+    """
+    path = os.path.join(cache_dir, "models", cell_name(n, dist_type, lambda_rounds, seed) + ".pkl")
+    if os.path.exists(path):
+        return sorter.load_model(path)
+
+    random.seed(seed)
+    training_data = step1.collect_training_data(n, lambda_rounds, dist_type)
+    start = time.process_time()
+    model = sorter.train_model(training_data)
+    model["meta"]["train_time"] = time.process_time() - start
+    model["meta"]["dist_type"] = dist_type
+    model["meta"]["seed"] = seed
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    sorter.save_model(model, path + ".tmp")
+    os.replace(path + ".tmp", path)
+    return model
+
+def run_cell(n, dist_type, lambda_rounds, seed, repeats, cache_dir):
+    model = load_or_train(n, dist_type, lambda_rounds, seed, cache_dir)
+
+    random.seed(seed + 1)  # 测试数据与训练数据使用不同的随机流
+    tests = [step1.generate_input(n, dist_type) for _ in range(repeats)]
+
+    funcs = {SELF_IMPROVING: lambda d: sorter.self_improving_sort(d, model), **ALGORITHMS}
+    runtime, memory = {}, {}
+    for name, func in funcs.items():
+        times, mems = [], []
+        for data in tests:
+            t, m, _ = timed(lambda: func(data.copy()))
+            times.append(t)
+            mems.append(m)
+        runtime[name] = sum(times) / repeats
+        memory[name] = sum(mems) / repeats
+
+    return {"n": n, "dist_type": dist_type, "lambda_rounds": lambda_rounds, "seed": seed,
+            "train_time": model["meta"]["train_time"], "runtime": runtime, "memory": memory}
+
+def train_cell(n, dist_type, lambda_rounds, seed, cache_dir):
+    load_or_train(n, dist_type, lambda_rounds, seed, cache_dir)  # 只写缓存，不把模型传回主进程
+
+def result_path(n, dist_type, lambda_rounds, seed, repeats, cache_dir):
+    return os.path.join(cache_dir, "results",
+                        cell_name(n, dist_type, lambda_rounds, seed) + f"_r{repeats}.json")
+
+def run_cell_cached(n, dist_type, lambda_rounds, seed, repeats, cache_dir):
+    path = result_path(n, dist_type, lambda_rounds, seed, repeats, cache_dir)
+    if os.path.exists(path):
+        with open(path) as f:
+            result = json.load(f)
+        if set(result["runtime"]) == {SELF_IMPROVING, *ALGORITHMS}:
+            return result  # 对照组集合变化后的旧结果需要重测
+
+    result = run_cell(n, dist_type, lambda_rounds, seed, repeats, cache_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", "w") as f:
+        json.dump(result, f)
+    os.replace(path + ".tmp", path)
+    return result
+
+def run_grid(ns, dist_types, lambda_rounds=None, seed=0, repeats=3, cache_dir="cache", workers=None):
+    """
+    输入：
+    - ns / dist_types: 实验网格
+    - lambda_rounds: 训练轮数（默认每个 n 取 ceil(log2 n)）
+    - workers: 训练阶段的进程数（默认 os.cpu_count()；1 表示在当前进程串行训练）。
+      计时阶段总是在当前进程中串行执行
+
+    输出：
+    - {(n, dist_type): 单元结果}
+    """
+    cells = []
+    for n in ns:
+        lam = lambda_rounds if lambda_rounds is not None else math.ceil(math.log2(n))
+        for dist in dist_types:
+            cells.append((n, dist, lam, seed, repeats, cache_dir))
+
+    # 训练阶段：只处理还没有结果的单元
+    pending = [(n, dist, lam, s, cache) for n, dist, lam, s, repeats, cache in cells
+               if not os.path.exists(result_path(n, dist, lam, s, repeats, cache))]
+    if workers == 1:
+        for cell in pending:
+            train_cell(*cell)
+    elif pending:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for future in [pool.submit(train_cell, *cell) for cell in pending]:
+                future.result()
+
+    # 计时阶段：串行
+    results = [run_cell_cached(*cell) for cell in cells]
+    return {(r["n"], r["dist_type"]): r for r in results}
+
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    grid = run_grid([100, 200, 400], ["piecewise", "uniform"], cache_dir="cache")
+    print(f"首次运行：{time.perf_counter() - start:.2f} 秒")
+
+    start = time.perf_counter()
+    grid = run_grid([100, 200, 400], ["piecewise", "uniform"], cache_dir="cache")
+    print(f"命中缓存：{time.perf_counter() - start:.2f} 秒")
+    for (n, dist), r in sorted(grid.items()):
+        print(f"n={n:<5} {dist:<10} 训练 {r['train_time']:.4f} 秒，稳态 {r['runtime'][SELF_IMPROVING]:.6f} 秒")
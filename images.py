@@ -10,7 +10,7 @@
 #  ├─ entropy_compare.png           (Figure ⑥ entropy‑vs‑comparisons)
 #  └─ training_cost.csv             (Table ⑦ raw numbers)
 
-import math, random, itertools, csv, os, pathlib, time, tracemalloc
+import math, csv, os, pathlib
 from collections import defaultdict
 
 import numpy as np
@@ -24,7 +24,8 @@ from step2 import build_v_list
 from step3 import estimate_distributions
 from step4 import build_all_di_trees
 from step5 import bucket_classify
-from utils  import generate_input, merge_sort, heap_sort, insertion_sort
+from utils  import generate_input
+from experiments import run_grid, ALGORITHMS, SELF_IMPROVING
 
 
 ##############################################################################
@@ -50,15 +51,6 @@ def plot_pipeline():
 ##############################################################################
 # helpers for timing / memory + comparison counting
 ##############################################################################
-def timed(fn):
-    tracemalloc.start()
-    t0 = time.perf_counter()
-    out = fn()
-    elapsed = time.perf_counter() - t0
-    _, peak = tracemalloc.get_traced_memory()
-    tracemalloc.stop()
-    return elapsed, peak/1024, out   # peak KB
-
 _COMPARE_COUNT = 0
 def reset_counter():  # call before each run that counts comparisons
     global _COMPARE_COUNT
@@ -81,73 +73,39 @@ def counting_insertion_sort(arr):
 ##############################################################################
 # 1. Runtime & Memory scaling (Figures ②③, Table ⑦) --------------------------
 ##############################################################################
-def experiment_scaling(ns, repeats=3):
+def experiment_scaling(ns, repeats=3, seed=0, cache_dir="cache", workers=None):
+    # every n is an independent cell: trained once in a process pool and cached on disk, then timed serially
+    grid = run_grid(ns, ["piecewise"], seed=seed, repeats=repeats,
+                    cache_dir=cache_dir, workers=workers)
     runtime = defaultdict(list)
     memory = defaultdict(list)
     training_rows = []
     for n in ns:
-        # independent training each size
-        train_data = collect_training_data(n)
-        v = build_v_list(train_data, v_length=n)
-        _, prob = estimate_distributions(train_data, v, n)
-        trees = build_all_di_trees(prob)
-
-        test = generate_input(n, "piecewise")
-        # --- algorithms
-        algs = {
-            "Self‑Improving": lambda d=test.copy(): \
-                bucket_classify_and_sort(d, trees, v),
-            "QuickSort":      lambda d=test.copy(): sorted(d),
-            "MergeSort":      lambda d=test.copy(): merge_sort(d),
-            "HeapSort":       lambda d=test.copy(): heap_sort(d)
-        }
-        # training cost (only once)
-        train_elapsed = 0
-        train_elapsed += 0  # place‑holder: real cost already paid above
-        # measure each alg
-        for name, f in algs.items():
-            times, mems = [], []
-            for _ in range(repeats):
-                t, m, _ = timed(f)
-                times.append(t); mems.append(m)
-            runtime[name].append(np.mean(times))
-            memory[name].append(np.mean(mems))
-        # store training vs steady saving (for table)
-        delta = runtime["QuickSort"][-1] - runtime["Self‑Improving"][-1]
-        training_rows.append([n, train_elapsed, delta,
-                              int(math.ceil(train_elapsed/max(delta,1e-9)))])
+        cell = grid[(n, "piecewise")]
+        for name in cell["runtime"]:
+            runtime[name].append(cell["runtime"][name])
+            memory[name].append(cell["memory"][name])
+        # store training vs steady saving (for table), against the fastest baseline
+        train_elapsed = cell["train_time"]
+        baseline = min(ALGORITHMS, key=lambda name: cell["runtime"][name])
+        delta = cell["runtime"][baseline] - cell["runtime"][SELF_IMPROVING]
+        break_even = int(math.ceil(train_elapsed/delta)) if delta > 0 else "never"
+        training_rows.append([n, baseline, train_elapsed, delta, break_even])
     # save csv
     with open("training_cost.csv","w", newline='') as fp:
-        writer = csv.writer(fp); writer.writerow(["n","train_time","delta_time","break_even_calls"])
+        writer = csv.writer(fp)
+        writer.writerow(["n","baseline","train_time","delta_time","break_even_calls"])
         writer.writerows(training_rows)
     return runtime, memory
 
-def bucket_classify_and_sort(arr, di_trees, v_list):
-    buckets = bucket_classify(arr, di_trees, v_list)
-    for b in buckets: heap_sort(b)
-    return list(itertools.chain.from_iterable(buckets))
-
 ##############################################################################
 # 2. Distribution sensitivity (Figure ④) -------------------------------------
 ##############################################################################
-def experiment_distributions(n=2000, repeats=5):
+def experiment_distributions(n=2000, repeats=5, seed=0, cache_dir="cache", workers=None):
     dist_types = ["uniform", "piecewise", "gaussian", "beta"]
-    results = {d: {"Self":0,"Quick":0,"Merge":0,"Heap":0} for d in dist_types}
-    for dist in dist_types:
-        train = collect_training_data(n, dist_type=dist)
-        v = build_v_list(train, n)
-        _, prob = estimate_distributions(train, v, n)
-        trees = build_all_di_trees(prob)
-        for _ in range(repeats):
-            data = generate_input(n,dist)
-            results[dist]["Self"]  += timed(lambda: bucket_classify_and_sort(data.copy(),trees,v))[0]
-            results[dist]["Quick"] += timed(lambda: sorted(data.copy()))[0]
-            results[dist]["Merge"] += timed(lambda: merge_sort(data.copy()))[0]
-            results[dist]["Heap"]  += timed(lambda: heap_sort(data.copy()))[0]
-    for d in dist_types:
-        for k in results[d]:
-            results[d][k] /= repeats
-    return results
+    grid = run_grid([n], dist_types, seed=seed, repeats=repeats,
+                    cache_dir=cache_dir, workers=workers)
+    return {d: grid[(n, d)]["runtime"] for d in dist_types}
 
 ##############################################################################
 # 3. Bucket heat‑map (Figure ⑤) ----------------------------------------------
@@ -194,30 +152,29 @@ def experiment_entropy_vs_comparisons(n=1000, repeats=10):
 ##############################################################################
 def draw_scaling_plots(ns, runtime, memory):
     labels = list(runtime.keys())
-    colors = ["#1f77b4","#ff7f0e","#2ca02c","#d62728"]
     # time
     plt.figure();
-    for lab,c in zip(labels,colors):
-        plt.plot(ns, runtime[lab], marker="o", label=lab, color=c)
+    for lab in labels:
+        plt.plot(ns, runtime[lab], marker="o", label=lab)
     plt.xlabel("Input size n"); plt.ylabel("Time (s)")
     plt.title("Sorting Time vs n"); plt.legend(); plt.tight_layout()
     plt.savefig("time_scaling.png"); plt.close()
     # memory
     plt.figure();
-    for lab,c in zip(labels,colors):
-        plt.plot(ns, memory[lab], marker="s", label=lab, color=c)
+    for lab in labels:
+        plt.plot(ns, memory[lab], marker="s", label=lab)
     plt.xlabel("Input size n"); plt.ylabel("Peak Memory (KB)")
     plt.title("Peak Memory vs n"); plt.legend(); plt.tight_layout()
     plt.savefig("memory_scaling.png"); plt.close()
 
 def draw_distribution_bar(results):
-    algs = ["Self","Quick","Merge","Heap"]
+    algs = [SELF_IMPROVING, *ALGORITHMS]
     x = np.arange(len(algs))
     width = .18
-    plt.figure(figsize=(7,4))
+    plt.figure(figsize=(10,4))
     for i,(dist,vals) in enumerate(results.items()):
         plt.bar(x+i*width, [vals[a] for a in algs], width, label=dist)
-    plt.xticks(x+1.5*width, ["Self-Improving","QuickSort","MergeSort","HeapSort"], rotation=15)
+    plt.xticks(x+1.5*width, algs, rotation=15)
     plt.ylabel("Average Time (s)"); plt.title("Runtime under Different Distributions")
     plt.legend(); plt.tight_layout(); plt.savefig("dist_time_bar.png"); plt.close()
 
@@ -233,6 +190,7 @@ if __name__ == "__main__":
 
     ns = [50,100,200,400,800,1600,3200,6400,12800,25600,40000]
     print("[2] scaling experiment...")
+    # cached cells live in ./images/cache, so a rerun only computes missing (n, dist) cells
     rt, mem = experiment_scaling(ns)
     draw_scaling_plots(ns, rt, mem)
 
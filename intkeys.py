@@ -0,0 +1,185 @@
+# intkeys.py：int64 键（时间戳、ID 等）的自改进排序
+#
+# 全程使用 int64 数组，不装箱成 Python int：
+#  - V-list 是 int64 数组，首尾用 INT64_MIN / INT64_MAX 作哨兵
+#  - 基数表：把 [base, top] 按高位切成 2^radix_bits 个格子，每格预先记下它覆盖的 V-list 区间范围，
+#    查找时先用 (x - base) >> shift 跳到格子，再在这个小范围里做几步向量化二分
+#  - trees 模式下用 step5.bucket_ids_batch 在打包后的 Di 树上按层向量化下行
+#  - 桶内排序：桶号按 16 位分段做稳定基数排序完成分散（O(n)），之后只对含逆序的桶做分段排序
+
+import numpy as np
+
+import step3, step4, step5
+
+INT64_MIN = np.iinfo(np.int64).min
+INT64_MAX = np.iinfo(np.int64).max
+RADIX_BITS = 16
+
+
+def build_int_v_list(training_data, v_length):
+    merged = np.sort(np.asarray(training_data, dtype=np.int64).ravel())
+    # 与 step2 相同的等分位点，但直接取样本值，保持整数
+    ranks = (np.arange(1, v_length) * len(merged)) // v_length
+    return np.concatenate(([INT64_MIN], merged[ranks], [INT64_MAX])).astype(np.int64)
+
+def as_uint64(values):
+    # int64 → uint64 的位级重解释，减法在 2^64 上回绕，得到正确的无符号差值
+    return np.asarray(values, dtype=np.int64).view(np.uint64)
+
+def build_radix_table(v_list, radix_bits=RADIX_BITS):
+    """
+    输出：(base, top, shift, first, last)
+    - 键 x 落在格子 c = (clip(x, base, top) - base) >> shift
+    - 格子 c 中的键只可能落在区间 first[c] .. last[c] 内
+    """
+    inner = v_list[1:-1]
+    base = int(inner[0]) if len(inner) else 0
+    top = int(inner[-1]) if len(inner) else 0
+    span = top - base
+    shift = max(0, span.bit_length() - radix_bits)
+    cells = (span >> shift) + 1
+
+    starts = (np.arange(cells, dtype=np.uint64) << np.uint64(shift)) + as_uint64(base)
+    starts = starts.view(np.int64)
+    ends = np.minimum((starts.view(np.uint64) + np.uint64((1 << shift) - 1)).view(np.int64), top)
+    ends[ends < starts] = top  # 最后一格可能回绕
+
+    num_buckets = len(v_list) - 1
+    first = np.clip(np.searchsorted(v_list, starts, side="right") - 1, 0, num_buckets - 1)
+    last = np.clip(np.searchsorted(v_list, ends, side="right") - 1, 0, num_buckets - 1)
+    return base, top, shift, first.astype(np.int64), last.astype(np.int64)
+
+def radix_bucket_ids(keys, v_list, radix):
+    """
+    基数表定位 + 范围内二分，返回与 v_list 上 searchsorted 相同的区间号（支持任意形状）
+    """
+    base, top, shift, first, last = radix
+    keys = np.asarray(keys, dtype=np.int64)
+    clipped = np.clip(keys, base, top)
+    cell = ((as_uint64(clipped) - as_uint64(base)) >> np.uint64(shift)).astype(np.int64)
+
+    # 不变式：v_list[lo] <= x < v_list[hi]
+    lo = first[cell]
+    hi = last[cell] + 1
+    below = keys < v_list[lo]  # 低于 base 的键归入 0 号桶
+    lo = np.where(below, 0, lo)
+    hi = np.where(below, 1, hi)
+    above = keys >= v_list[hi]  # 不低于 top 的键直接归到最后的区间
+    lo = np.where(above, len(v_list) - 2, lo)
+    hi = np.where(above, len(v_list) - 1, hi)
+
+    while True:
+        open_ = hi - lo > 1
+        if not open_.any():
+            break
+        mid = (lo + hi) // 2
+        go_right = open_ & (v_list[mid] <= keys)
+        go_left = open_ & ~go_right
+        lo = np.where(go_right, mid, lo)
+        hi = np.where(go_left, mid, hi)
+    return lo
+
+def estimate_int_distributions(training_data, v_list, radix):
+    """
+    与 step3.estimate_distributions 相同的频率/概率矩阵，但用基数表向量化分类
+    """
+    data = np.asarray(training_data, dtype=np.int64)
+    lambda_rounds, n = data.shape
+    ids = radix_bucket_ids(data, v_list, radix)
+    freq = np.zeros((n, len(v_list) - 1), dtype=np.uint16)
+    np.add.at(freq, (np.broadcast_to(np.arange(n), ids.shape), ids), 1)
+    prob = freq.astype(np.float32) / lambda_rounds
+    return freq, prob
+
+def train_int_model(training_data, v_length=None, group_size=1, mode="global", radix_bits=RADIX_BITS):
+    """
+    输入：
+    - training_data: int64 数组（lambda_rounds × n）
+    - mode: "global" 只用 V-list + 基数表；"trees" 额外构建 Di 树（打包后向量化分类）
+
+    输出：
+    - model: 与 sorter 模型相同的字典，另含 "key_dtype": "int64" 和 "radix"
+    """
+    if mode not in ("trees", "global"):
+        raise ValueError("Unknown classification mode")
+    data = np.asarray(training_data, dtype=np.int64)
+    n = data.shape[1]
+    if v_length is None:
+        v_length = n
+
+    v_list = build_int_v_list(data, v_length)
+    radix = build_radix_table(v_list, radix_bits)
+    di_trees = packed = None
+    if mode == "trees":
+        _, prob = estimate_int_distributions(data, v_list, radix)
+        prob_matrix = step3.group_distributions(prob.tolist(), group_size)
+        di_trees = step4.build_all_di_trees(prob_matrix)
+        packed = step5.pack_trees(di_trees)
+
+    meta = {"n": n, "v_length": v_length, "lambda_rounds": data.shape[0], "group_size": group_size,
+            "lazy": False, "mode": mode, "radix_bits": radix_bits}
+    return {"v_list": v_list, "di_trees": di_trees, "packed": packed, "group_size": group_size,
+            "mode": mode, "key_dtype": "int64", "radix": radix, "meta": meta}
+
+def bucket_ids(keys, model):
+    if model["mode"] == "trees":
+        return step5.bucket_ids_batch(np.asarray(keys, dtype=np.int64), model["packed"],
+                                      model["v_list"], model["group_size"])
+    return radix_bucket_ids(keys, model["v_list"], model["radix"])
+
+def bucket_order(ids, num_buckets):
+    """
+    按桶号稳定分散：uint16 的稳定 argsort 是基数排序，桶数超过 2^16 时按低、高 16 位各做一遍
+    """
+    order = np.argsort((ids & 0xFFFF).astype(np.uint16), kind="stable")
+    if num_buckets > 1 << 16:
+        order = order[np.argsort((ids[order] >> 16).astype(np.uint16), kind="stable")]
+    return order
+
+def argsort(keys, model):
+    """
+    稳定 argsort：按桶号稳定分散后桶间已有序，只有出现逆序的桶才需要排序；
+    这些桶的元素按 (桶号, key) 一次 lexsort，桶仍留在原来的段内
+    """
+    keys = np.asarray(keys, dtype=np.int64)
+    num_buckets = len(model["v_list"]) - 1
+    ids = bucket_ids(keys, model)
+    order = bucket_order(ids, num_buckets)
+
+    sorted_keys, sorted_ids = keys[order], ids[order]
+    inverted = sorted_keys[1:] < sorted_keys[:-1]  # 桶间不会逆序，只可能发生在同一桶内
+    if not inverted.any():
+        return order
+    dirty = np.zeros(num_buckets, dtype=bool)
+    dirty[sorted_ids[1:][inverted]] = True
+    sub = np.flatnonzero(dirty[sorted_ids])
+    order[sub] = order[sub][np.lexsort((sorted_keys[sub], sorted_ids[sub]))]
+    return order
+
+def sort(keys, model, payload=None, return_indices=False):
+    keys = np.asarray(keys, dtype=np.int64)
+    perm = argsort(keys, model)
+    if return_indices:
+        return perm
+    if payload is not None:
+        return keys[perm], np.asarray(payload)[perm]
+    return keys[perm]
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(42)
+    n, lambda_rounds = 2000, 11
+
+    def generate_timestamps():
+        # 每个位置一个时间窗口（纳秒级时间戳 + 抖动）
+        return 1_700_000_000_000_000_000 + np.arange(n, dtype=np.int64) * 1_000_000 \
+            + rng.integers(0, 1_000_000, size=n)
+
+    training_data = np.stack([generate_timestamps() for _ in range(lambda_rounds)])
+    for mode in ["global", "trees"]:
+        model = train_int_model(training_data, mode=mode)
+        keys = generate_timestamps()
+        ids = bucket_ids(keys, model)
+        expected = np.clip(np.searchsorted(model["v_list"], keys, side="right") - 1, 0, len(model["v_list"]) - 2)
+        print(f"{mode}: 桶号正确: {np.array_equal(ids, expected)}，"
+              f"排序正确: {np.array_equal(sort(keys, model), np.sort(keys))}")
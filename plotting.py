@@ -0,0 +1,42 @@
+# plotting.py：绘图工具（只在需要出图时导入）
+
+import matplotlib.pyplot as plt
+import seaborn as sns
+
+def set_plot_style():
+    sns.set_theme(style="whitegrid")
+    plt.rcParams['font.family'] = 'Arial'
+    plt.rcParams['axes.unicode_minus'] = False
+
+
+def plot_bar_chart(x_labels, values, ylabel, title, rotation=45):
+    plt.figure(figsize=(8, 6))
+    sns.barplot(x=x_labels, y=values)
+    plt.ylabel(ylabel)
+    plt.title(title)
+    plt.xticks(rotation=rotation)
+    plt.tight_layout()
+    plt.show()
+
+
+def plot_line_chart(x, ys, labels, ylabel, title):
+    plt.figure(figsize=(8, 6))
+    for y, label in zip(ys, labels):
+        plt.plot(x, y, marker='o', label=label)
+    plt.ylabel(ylabel)
+    plt.title(title)
+    plt.xlabel("Data Size")
+    plt.legend()
+    plt.grid(True)
+    plt.tight_layout()
+    plt.show()
+
+
+def plot_heatmap(matrix, title):
+    plt.figure(figsize=(10, 8))
+    sns.heatmap(matrix, cmap="YlGnBu")
+    plt.title(title)
+    plt.xlabel("Bucket Index")
+    plt.ylabel("Data Index")
+    plt.tight_layout()
+    plt.show()
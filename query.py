@@ -0,0 +1,98 @@
+# query.py：Top-k / 第 k 小 / 区间查询，只对相关桶排序
+#
+# V-list 给出了桶之间的全局顺序：分类一次得到桶号后，用桶计数的前缀和
+# 就能定位目标名次或取值范围落在哪些桶里，其余桶完全不用排序。
+# int64 模型全程使用 int64 数组（不转成 Python int），选中的桶用一次 lexsort 排序。
+
+import bisect
+
+import numpy as np
+
+import step1
+import sorter
+from classic_sorters import insertion_sort
+
+
+def classify(data, model):
+    """
+    返回 (keys 数组, keys 的 list 或 None, 桶号, 桶计数)；int64 模型不生成 list
+    """
+    keys = np.asarray(data, dtype=sorter.key_dtype(model))
+    key_list = None if sorter.is_int_model(model) else keys.tolist()
+    ids = sorter.bucket_ids(keys if key_list is None else key_list, model)
+    counts = np.bincount(ids, minlength=len(model["v_list"]) - 1)
+    return keys, key_list, ids, counts
+
+def sort_selected(keys, key_list, ids, selected):
+    """
+    对下标子集 selected 做桶内排序（先按桶号稳定分散，再桶内插入排序），返回有序下标；
+    key_list 为 None 时（int64 模型）按 (桶号, key) 做一次稳定的 lexsort
+    """
+    if key_list is None:
+        return selected[np.lexsort((keys[selected], ids[selected]))]
+
+    sub_ids = ids[selected]
+    perm = selected[np.argsort(sub_ids, kind="stable")].tolist()
+    counts = np.bincount(sub_ids - sub_ids.min()).tolist() if len(sub_ids) else []
+
+    start = 0
+    for c in counts:
+        if c > 1:
+            insertion_sort(perm, start, start + c, key_list.__getitem__)
+        start += c
+    return perm
+
+def top_k(data, model, k, return_indices=False):
+    """
+    返回最小的 k 个值（升序）；return_indices=True 时返回它们在 data 中的下标
+    """
+    keys, key_list, ids, counts = classify(data, model)
+    k = max(0, min(k, len(keys)))
+    if k == 0:
+        return np.empty(0, dtype=np.int64 if return_indices else keys.dtype)
+
+    last = int(np.searchsorted(np.cumsum(counts), k))  # 第 k 个元素所在的桶
+    perm = sort_selected(keys, key_list, ids, np.flatnonzero(ids <= last))[:k]
+    perm = np.array(perm, dtype=np.int64)
+    return perm if return_indices else keys[perm]
+
+def select_k(data, model, k):
+    """
+    返回第 k 小的值（k 从 0 开始），只排序它所在的那一个桶
+    """
+    keys, key_list, ids, counts = classify(data, model)
+    if not 0 <= k < len(keys):
+        raise IndexError("k out of range")
+
+    cum = np.cumsum(counts)
+    b = int(np.searchsorted(cum, k + 1))
+    before = int(cum[b - 1]) if b > 0 else 0
+    perm = sort_selected(keys, key_list, ids, np.flatnonzero(ids == b))
+    return keys[perm[k - before]]
+
+def range_query(data, model, a, b, return_indices=False):
+    """
+    返回落在 [a, b] 内的全部值（升序），只处理与该区间重叠的桶
+    """
+    keys, key_list, ids, _ = classify(data, model)
+    v_list = model["v_list"]
+    num_buckets = len(v_list) - 1
+    lo = max(0, min(bisect.bisect_right(v_list, a) - 1, num_buckets - 1))
+    hi = max(0, min(bisect.bisect_right(v_list, b) - 1, num_buckets - 1))
+
+    candidates = np.flatnonzero((ids >= lo) & (ids <= hi))
+    inside = candidates[(keys[candidates] >= a) & (keys[candidates] <= b)]
+    perm = np.array(sort_selected(keys, key_list, ids, inside), dtype=np.int64)
+    return perm if return_indices else keys[perm]
+
+
+if __name__ == "__main__":
+    n = 1000
+    model = sorter.train(n)
+    data = np.array(step1.generate_input(n))
+    expected = np.sort(data)
+
+    print("top_k 正确:", np.array_equal(top_k(data, model, 10), expected[:10]))
+    print("select_k 正确:", select_k(data, model, 500) == expected[500])
+    print("range_query 正确:",
+          np.array_equal(range_query(data, model, 100, 120), expected[(expected >= 100) & (expected <= 120)]))
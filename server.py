@@ -0,0 +1,210 @@
+# server.py：本地 asyncio 排序服务，对并发请求做微批处理
+#
+# 协议（Unix socket 或 localhost TCP，一个连接上可连续发多个请求）：
+#  - 请求：uint64 元素个数 m（网络字节序）+ m 个 float64
+#  - 响应：uint8 状态 + uint64 长度 + 负载
+#           状态 0：负载为 m 个有序 float64；状态 1：负载为 UTF-8 错误信息
+#
+# 服务常驻一个已加载的模型（V-list + Di 树）。在 max_wait 时间窗内到达的请求
+# 合并成一批，用 step5.bucket_ids_batch 做一次向量化分类，再逐个完成桶内排序。
+# 队列满时 handler 暂停读取 socket，由此向客户端施加背压。
+# 元素个数与模型的 n 不符时，不读取负载，直接返回错误并关闭连接。
+
+import asyncio
+import struct
+import time
+from collections import deque
+
+import numpy as np
+
+import step5
+import sorter
+import compact
+
+HEADER = struct.Struct("!Q")
+RESPONSE = struct.Struct("!BQ")
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+
+class SortService:
+    def __init__(self, model, batch_size=32, max_wait=0.002, max_queue=1024, latency_window=10000):
+        self.model = model
+        self.n = model["meta"]["n"]
+        self.num_buckets = len(model["v_list"]) - 1
+        self.global_mode = model.get("mode", "trees") == "global"
+        self.compact = bool(model.get("compact"))
+        self.packed = None if self.global_mode or self.compact else step5.pack_trees(model["di_trees"])
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.latencies = deque(maxlen=latency_window)
+        self.requests = 0
+        self.batches = 0
+        self.errors = 0
+        self.pending = []  # 批处理任务当前持有的请求
+
+    # --- 批处理 ---
+    def sort_batch(self, batch):
+        if self.compact:
+            ids = compact.bucket_ids(batch, self.model)
+        elif self.global_mode:
+            ids = step5.bucket_ids_global(batch, self.model["v_list"])
+        else:
+            ids = step5.bucket_ids_batch(batch, self.packed, self.model["v_list"], self.model["group_size"])
+        budget = sorter.work_budget(self.model, batch.shape[1])  # 桶内插入排序的最坏情况保护
+        sorter.guard_counts["calls"] += len(batch)  # 每个请求是一次受保护的调用
+        results = []
+        for row, row_ids in zip(batch, ids):
+            perm = sorter.argsort_from_ids(row.tolist(), row_ids, self.num_buckets, budget)
+            results.append(row[perm])
+        return results
+
+    async def batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            items = self.pending = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(items) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    items.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            batch = np.stack([data for data, _ in items])
+            try:
+                results = await loop.run_in_executor(None, self.sort_batch, batch)
+            except Exception as exc:  # 整批失败时逐个通知调用方
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(exc)
+            else:
+                for (_, future), result in zip(items, results):
+                    if not future.done():  # 客户端可能已断开
+                        future.set_result(result)
+            self.batches += 1
+
+    async def submit(self, data):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((data, future))  # 队列满时在此等待（背压）
+        return await future
+
+    # --- 连接处理 ---
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    header = await reader.readexactly(HEADER.size)
+                except asyncio.IncompleteReadError:
+                    break
+                (m,) = HEADER.unpack(header)
+                if m != self.n:  # 负载长度不可信：不读取，报错后关闭连接
+                    self.errors += 1
+                    message = f"Expected {self.n} elements, got {m}".encode()
+                    writer.write(RESPONSE.pack(STATUS_ERROR, len(message)) + message)
+                    await writer.drain()
+                    break
+
+                payload = await reader.readexactly(8 * m)
+                start = time.perf_counter()
+                data = np.frombuffer(payload, dtype=">f8").astype(np.float64)
+                try:
+                    result = await self.submit(data)
+                except ConnectionError:  # 服务正在关闭
+                    break
+                writer.write(RESPONSE.pack(STATUS_OK, m) + result.astype(">f8").tobytes())
+                self.requests += 1
+                self.latencies.append(time.perf_counter() - start)
+                await writer.drain()
+        finally:
+            writer.close()
+
+    def metrics(self):
+        lat = np.array(self.latencies) if self.latencies else np.zeros(1)
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "errors": self.errors,
+            "avg_batch": self.requests / max(self.batches, 1),
+            "queue_depth": self.queue.qsize(),
+            "p50_ms": float(np.percentile(lat, 50)) * 1000,
+            "p99_ms": float(np.percentile(lat, 99)) * 1000,
+        }
+
+    async def start(self, host="127.0.0.1", port=8765, path=None):
+        self.batch_task = asyncio.create_task(self.batch_loop())
+        if path is not None:
+            self.server = await asyncio.start_unix_server(self.handle, path=path)
+        else:
+            self.server = await asyncio.start_server(self.handle, host, port)
+        return self.server
+
+    async def close(self):
+        """
+        停止接受新连接并取消批处理任务；尚未完成的请求以 ConnectionError 结束
+        """
+        self.server.close()
+        self.batch_task.cancel()
+        try:
+            await self.batch_task
+        except asyncio.CancelledError:
+            pass
+
+        while not self.queue.empty():
+            self.pending.append(self.queue.get_nowait())
+        for _, future in self.pending:
+            if not future.done():
+                future.set_exception(ConnectionError("Sort service is shutting down"))
+        self.pending = []
+
+
+# --- 客户端 ---
+async def open_client(host="127.0.0.1", port=8765, path=None):
+    if path is not None:
+        return await asyncio.open_unix_connection(path)
+    return await asyncio.open_connection(host, port)
+
+async def sort_remote(reader, writer, data):
+    data = np.asarray(data, dtype=">f8")
+    writer.write(HEADER.pack(data.size) + data.tobytes())
+    await writer.drain()
+    status, length = RESPONSE.unpack(await reader.readexactly(RESPONSE.size))
+    if status == STATUS_ERROR:
+        raise ValueError((await reader.readexactly(length)).decode())
+    return np.frombuffer(await reader.readexactly(8 * length), dtype=">f8").astype(np.float64)
+
+
+if __name__ == "__main__":
+    import step1
+
+    async def demo(n=1000, clients=64, rounds=5):
+        service = SortService(sorter.train(n), batch_size=32, max_wait=0.002)
+        server = await service.start(port=0)
+        port = server.sockets[0].getsockname()[1]
+
+        async def client():
+            reader, writer = await open_client(port=port)
+            for _ in range(rounds):
+                data = step1.generate_input(n)
+                assert np.array_equal(await sort_remote(reader, writer, data), np.sort(data))
+            writer.close()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(clients)))
+        elapsed = time.perf_counter() - start
+        print(f"{clients * rounds} 个请求，用时 {elapsed:.3f} 秒")
+        print("服务指标:", service.metrics())
+
+        # 元素个数不符：服务端不读取负载，直接报错并关闭连接
+        reader, writer = await open_client(port=port)
+        try:
+            await sort_remote(reader, writer, np.zeros(n + 1))
+        except ValueError as exc:
+            print("错误请求:", exc, "，连接已关闭:", reader.at_eof() or not await reader.read())
+        writer.close()
+        await service.close()
+
+    asyncio.run(demo())
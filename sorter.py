@@ -0,0 +1,301 @@
+# sorter.py：把 step1–step5 串成一个可保存/加载的模型，供稳态排序复用
+
+import math
+import pickle
+import time
+from collections import deque
+
+import numpy as np
+
+import step1, step2, step3, step4, step5
+import intkeys
+import compact
+from classic_sorters import insertion_sort, heapsort
+
+
+# --- 最坏情况保护 ---
+# 每次调用的工作量预算 = GUARD_FACTOR × (ΣH + GUARD_LINEAR × n)，ΣH 为实际构树所用分布（分组后）的熵之和。
+# 计入预算的是 Di 树上的比较次数（逐元素分类路径）和桶内插入排序的移动次数；
+# 向量化分类（global / compact / int64）本身有界，不计入。超出预算时本次调用改走 O(n log n)：
+# 分类阶段超出 → 整体堆排序（argsort 用稳定排序）；桶内阶段超出 → 剩余桶改用堆排序。
+GUARD_FACTOR = 4.0
+GUARD_LINEAR = 2.0
+GUARD_TRIGGERS = deque(maxlen=1000)  # 最近的触发记录
+guard_counts = {"calls": 0, "triggers": 0}
+
+def work_budget(model, n):
+    num_intervals = max(len(model["v_list"]) - 1, 2)
+    entropy = model["meta"].get("tree_entropy")
+    if entropy is None and model.get("group_size", 1) == 1:
+        entropy = model["meta"].get("mean_entropy")  # 不分组时两者相同
+    if entropy is None:  # 旧模型没有对应的熵信息，按二分查找的代价估计
+        entropy = math.log2(num_intervals)
+    return int(GUARD_FACTOR * (entropy * n + GUARD_LINEAR * n)) + 1
+
+def record_trigger(n, budget, phase):
+    guard_counts["triggers"] += 1
+    GUARD_TRIGGERS.append({"time": time.time(), "n": n, "budget": budget, "phase": phase})
+
+def guard_report():
+    return {**guard_counts, "recent": list(GUARD_TRIGGERS)}
+
+# Di 树的期望比较次数约为 H_i + O(1)，全局二分查找为 log2(区间数)；
+# 平均熵与 log2(区间数) 的差距小于 ENTROPY_MARGIN（比特）时，认为 Di 树不划算。
+# λ 个样本估计出的熵最多只有 log2(λ)，平均熵达到该上限的 ENTROPY_SATURATION 倍时，
+# 说明各位置的样本几乎互不相同，同样看不出比全局分布更集中。
+ENTROPY_MARGIN = 1.0
+ENTROPY_SATURATION = 0.9
+
+def choose_mode(prob_matrix, lambda_rounds):
+    """
+    根据训练得到的各位置熵选择分类方式："trees"（Di 树）或 "global"（np.searchsorted）
+    """
+    num_intervals = len(prob_matrix[0])
+    mean_entropy = float(step3.position_entropies(prob_matrix).mean())
+    observable = math.log2(min(lambda_rounds, num_intervals))
+    bound = min(math.log2(num_intervals) - ENTROPY_MARGIN, ENTROPY_SATURATION * observable)
+    if mean_entropy < bound:
+        return "trees", mean_entropy
+    return "global", mean_entropy
+
+# --- 训练：由训练数据构建模型 ---
+def train_model(training_data, v_length=None, group_size=1, lazy=False, cache_bytes=None, mode="trees"):
+    """
+    输入：
+    - training_data: 二维数组（lambda_rounds × n）
+    - v_length: V-list 长度（默认为 n）
+    - group_size: 每棵 Di 树覆盖的相邻位置数
+    - lazy: 为 True 时不预先构树，改用 step4.LazyDiForest 按需构建
+    - cache_bytes: 惰性模式下常驻 Di 树的字节上限（None 表示不限）
+    - mode: "trees" 构建 Di 树；"global" 只保留 V-list，分类用一次 np.searchsorted；
+            "auto" 由 choose_mode 按各位置熵决定
+
+    输出：
+    - model: {"v_list", "di_trees", "group_size", "mode", "meta"}（global 模式下 di_trees 为 None）
+    """
+    if mode not in ("trees", "global", "auto"):
+        raise ValueError("Unknown classification mode")
+
+    n = len(training_data[0])
+    if v_length is None:
+        v_length = n
+
+    v_list = step2.build_v_list(training_data, v_length)
+    _, prob_matrix = step3.estimate_distributions(training_data, v_list, n)
+    auto_mode, mean_entropy = choose_mode(prob_matrix, len(training_data))
+    if mode == "auto":
+        mode = auto_mode
+
+    prob_matrix = step3.group_distributions(prob_matrix, group_size)
+    # Di 树按分组后的分布构建，下行代价（work_budget）要按这份分布的熵估计；
+    # mean_entropy 仍是逐位置的熵，供 choose_mode 使用
+    tree_entropy = mean_entropy
+    if group_size > 1 and mode != "global":
+        tree_entropy = float(step3.position_entropies(prob_matrix).mean())
+
+    if mode == "global":
+        di_trees = None
+    elif lazy:
+        di_trees = step4.LazyDiForest(prob_matrix, cache_bytes)
+    else:
+        di_trees = step4.build_all_di_trees(prob_matrix)
+
+    meta = {
+        "n": n,
+        "v_length": v_length,
+        "lambda_rounds": len(training_data),
+        "group_size": group_size,
+        "lazy": lazy,
+        "mode": mode,
+        "mean_entropy": mean_entropy,
+        "tree_entropy": tree_entropy,
+    }
+    return {"v_list": v_list, "di_trees": di_trees, "group_size": group_size, "mode": mode, "meta": meta}
+
+def train(n, lambda_rounds=None, dist_type="piecewise", v_length=None, group_size=1,
+          lazy=False, cache_bytes=None, mode="trees"):
+    training_data = step1.collect_training_data(n, lambda_rounds, dist_type)
+    return train_model(training_data, v_length, group_size, lazy, cache_bytes, mode)
+
+# --- 分类（按模型的 mode 分派） ---
+def is_int_model(model):
+    return model.get("key_dtype") == "int64"
+
+def key_dtype(model):
+    return np.int64 if is_int_model(model) else np.float64
+
+def bucket_ids(key_list, model):
+    if is_int_model(model):
+        return intkeys.bucket_ids(np.asarray(key_list, dtype=np.int64), model)
+    if model.get("compact"):
+        return compact.bucket_ids(key_list, model)
+    if model.get("mode", "trees") == "global":
+        return step5.bucket_ids_global(key_list, model["v_list"])
+    return step5.bucket_ids(key_list, model["di_trees"], model["v_list"], model["group_size"])
+
+def bucket_classify(data, model):
+    if model.get("compact"):
+        return step5.scatter_to_buckets(data, compact.bucket_ids(data, model), len(model["v_list"]) - 1)
+    if model.get("mode", "trees") == "global":
+        return step5.bucket_classify_global(data, model["v_list"])
+    return step5.bucket_classify(data, model["di_trees"], model["v_list"], model["group_size"])
+
+def bucket_ids_budget(key_list, model, budget):
+    """
+    返回 (桶号数组或 None, 已用比较次数)；只有逐元素 Di 树分类会计数并可能放弃
+    """
+    if is_int_model(model) or model.get("compact") or model.get("mode", "trees") == "global":
+        return bucket_ids(key_list, model), 0
+    return step5.bucket_ids_guarded(key_list, model["di_trees"], model["v_list"], model["group_size"], budget)
+
+# --- 稳态排序 ---
+def argsort(keys, model, guard=True):
+    """
+    稳定 argsort：分类只产生桶号，按桶号稳定分散下标，再在桶内按 key 插入排序。
+    返回 int64 排列 perm，使 keys[perm] 有序，相等 key 保持原始相对顺序。
+    guard=True 时受 work_budget 约束，超出后改用稳定的 O(n log n) 排序。
+    """
+    if is_int_model(model):
+        return intkeys.argsort(keys, model)  # 向量化的稳定排序，本身就是 O(n log n)
+    key_list = keys.tolist() if isinstance(keys, np.ndarray) else list(keys)
+    n = len(key_list)
+    budget = work_budget(model, n) if guard else None
+    if guard:
+        guard_counts["calls"] += 1
+
+    ids, spent = bucket_ids_budget(key_list, model, budget)
+    if ids is None:
+        record_trigger(n, budget, "classify")
+        return np.argsort(np.asarray(key_list), kind="stable")
+    return argsort_from_ids(key_list, ids, len(model["v_list"]) - 1,
+                            None if budget is None else budget - spent)
+
+def argsort_from_ids(key_list, ids, num_buckets, budget=None):
+    """
+    已知每个位置的桶号时的稳定 argsort（供批量分类后复用）；
+    budget 为桶内插入排序的移动预算，超出后剩余的桶改用稳定的 O(c log c) 排序
+    """
+    order = np.argsort(ids, kind="stable")  # 按桶号分散下标（同桶内保持原始顺序）
+    counts = np.bincount(ids, minlength=num_buckets)
+
+    perm = order.tolist()
+    remaining = math.inf if budget is None else budget
+    start = 0
+    for c in counts.tolist():
+        if c > 1:
+            if remaining >= 0:
+                remaining = insertion_sort(perm, start, start + c, key_list.__getitem__, remaining)
+                if remaining < 0:
+                    record_trigger(len(key_list), budget, "buckets")
+            if remaining < 0:
+                perm[start:start + c] = sorted(perm[start:start + c], key=key_list.__getitem__)
+        start += c
+    return np.array(perm, dtype=np.int64)
+
+def guarded_sort(data, model):
+    """
+    按值排序的受保护版本：超出 work_budget 时改用堆排序，保证 O(n log n)
+    """
+    n = len(data)
+    budget = work_budget(model, n)
+    guard_counts["calls"] += 1
+
+    ids, spent = bucket_ids_budget(data, model, budget)
+    if ids is None:
+        record_trigger(n, budget, "classify")
+        return heapsort(list(data))
+
+    remaining = budget - spent
+    result = []
+    for bucket in step5.scatter_to_buckets(data, ids, len(model["v_list"]) - 1):
+        if remaining >= 0:
+            remaining = insertion_sort(bucket, budget=remaining)
+            if remaining < 0:
+                record_trigger(n, budget, "buckets")
+        if remaining < 0:
+            heapsort(bucket)
+        result.extend(bucket)
+    return result
+
+def self_improving_sort(data, model, key=None, payload=None, return_indices=False, guard=True):
+    """
+    输入：
+    - data: 浮点 list、NumPy key 数组，或（配合 key）任意记录序列
+    - key: 从记录中取浮点 key 的函数；给出时返回按 key 稳定排序后的记录 list
+    - payload: 与 data 等长的数组；给出时返回 (有序 keys, 同序 payload)
+    - return_indices: 为 True 时只返回稳定排列 perm
+    - guard: 为 True 时每次调用受 work_budget 约束，超出后切换到 O(n log n) 路径并记录到 GUARD_TRIGGERS
+
+    不传任何选项且 data 为 list 时，走原始的按值分桶路径；int64 模型（intkeys）始终走数组路径。
+    """
+    if key is None and payload is None and not return_indices and not isinstance(data, np.ndarray) \
+            and not is_int_model(model):
+        if guard:
+            return guarded_sort(data, model)
+        buckets = bucket_classify(data, model)
+        result = []
+        for bucket in buckets:
+            insertion_sort(bucket)
+            result.extend(bucket)
+        return result
+
+    if key is not None:
+        keys = np.fromiter((key(r) for r in data), dtype=key_dtype(model), count=len(data))
+    elif is_int_model(model):
+        keys = np.asarray(data, dtype=np.int64)
+    else:
+        keys = np.asarray(data)
+
+    perm = argsort(keys, model, guard)
+    if return_indices:
+        return perm
+    if key is not None:
+        return [data[i] for i in perm.tolist()]
+    if payload is not None:
+        return keys[perm], np.asarray(payload)[perm]
+    return keys[perm]
+
+# --- 模型持久化 ---
+def model_bytes(model):
+    return len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+
+def save_model(model, filename="model.pkl"):
+    with open(filename, "wb") as f:
+        pickle.dump(model, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+def load_model(filename="model.pkl"):
+    with open(filename, "rb") as f:
+        return pickle.load(f)
+
+
+if __name__ == "__main__":
+    n = 1000
+    model = train(n)
+    data = step1.generate_input(n)
+    result = self_improving_sort(data, model)
+    print("排序正确:", result == sorted(data))
+
+    keys = np.array(data)
+    payload = np.arange(n)
+    sorted_keys, sorted_payload = self_improving_sort(keys, model, payload=payload)
+    print("argsort 与 np.argsort(stable) 一致:",
+          np.array_equal(sorted_payload, np.argsort(keys, kind="stable")))
+
+    for dist in ["piecewise", "uniform"]:
+        auto_model = train(n, dist_type=dist, mode="auto")
+        data = step1.generate_input(n, dist)
+        print(f"{dist}: 平均熵 {auto_model['meta']['mean_entropy']:.2f} 比特 → {auto_model['mode']} 模式，"
+              f"排序正确: {self_improving_sort(data, auto_model) == sorted(data)}")
+    print("模型大小:", model_bytes(model), "bytes")
+
+    # 平移后的输入：所有元素都落进训练时没见过的区间，触发最坏情况保护
+    shifted = [x + n / 2 for x in step1.generate_input(n)]
+    print("平移输入排序正确:", self_improving_sort(shifted, model) == sorted(shifted))
+    print("保护触发记录:", guard_counts, [t["phase"] for t in GUARD_TRIGGERS])
+
+    # 分组模型：预算按分组后的熵计算，分布内输入不应触发保护
+    triggers = guard_counts["triggers"]
+    grouped = train(n, group_size=256)
+    ok = all(self_improving_sort(d, grouped) == sorted(d) for d in (step1.generate_input(n) for _ in range(3)))
+    print(f"分组模型（group_size=256，树熵 {grouped['meta']['tree_entropy']:.2f} 比特）排序正确: {ok}，"
+          f"新增触发: {guard_counts['triggers'] - triggers}")
@@ -29,6 +29,32 @@ def estimate_distributions(training_data, v_list, n):
     # ✅ 返回 list 保持兼容性
     return freq_matrix.tolist(), prob_matrix.tolist()
 
+ENTROPY_CHUNK = 256  # 每次转换成数组的行数，临时内存为 O(ENTROPY_CHUNK × 区间数)
+
+def position_entropies(prob_matrix):
+    """
+    每个位置分布的香农熵 H_i = -Σ p log2 p（比特），与 images.experiment_entropy_vs_comparisons 一致。
+    按行分块用 float32 计算，只对非零概率取对数，不生成 n × 区间数 的稠密临时数组
+    """
+    entropies = np.empty(len(prob_matrix), dtype=np.float64)
+    for s in range(0, len(prob_matrix), ENTROPY_CHUNK):
+        chunk = np.asarray(prob_matrix[s:s + ENTROPY_CHUNK], dtype=np.float32)
+        log_p = np.log2(chunk, out=np.zeros_like(chunk), where=chunk > 0)
+        log_p *= chunk
+        entropies[s:s + len(chunk)] = -log_p.sum(axis=1, dtype=np.float64)
+    return np.maximum(entropies, 0.0)
+
+def group_distributions(prob_matrix, group_size):
+    """
+    将相邻 group_size 个位置的分布取平均，每组共享一棵 Di 树（配合 step5 的 GROUP_SIZE）
+    """
+    if group_size <= 1:
+        return prob_matrix
+
+    prob = np.asarray(prob_matrix, dtype=np.float32)
+    grouped = [prob[s:s + group_size].mean(axis=0) for s in range(0, prob.shape[0], group_size)]
+    return np.array(grouped, dtype=np.float32).tolist()
+
 if __name__ == "__main__":
     n = 10
     training_data = step1.collect_training_data(n)
@@ -2,29 +2,41 @@
 
 import step1, step2, step3
 
+import sys
+from collections import OrderedDict
+
+import numpy as np
+
 # 树节点采用数组结构：每个节点是 (split_index, left_idx, right_idx)
 def build_approximate_bst_array(prob):
     nodes = []  # 最终树节点列表
-    stack = [(0, len(prob) - 1, None, None)]  # (left, right, parent_idx, is_left)
+    stack = [(0, len(prob) - 1, None, None, False)]  # (left, right, parent_idx, is_left, beside_mass)
     index_map = {}  # 记录每个区间的根在 nodes 中的位置
 
     while stack:
-        left, right, parent_idx, is_left = stack.pop()
+        left, right, parent_idx, is_left, beside_mass = stack.pop()
         if left > right:
             node_idx = None
         else:
             total = sum(prob[left:right + 1])
-            acc = 0
-            for i in range(left, right + 1):
-                acc += prob[i]
-                if acc >= total / 2:
-                    root_index = i
-                    break
+            if total == 0 and beside_mass:
+                # 紧挨着有样本区间的空白段：先放靠近样本的边界，落在训练区间内的 x 一步即可确认
+                root_index = right if is_left else left
+            elif total == 0:
+                # 其余空白段取中点保持平衡（否则会退化成链，落在训练区间外的 x 最坏要 O(n) 次比较）
+                root_index = (left + right) // 2
+            else:
+                acc = 0
+                for i in range(left, right + 1):
+                    acc += prob[i]
+                    if acc >= total / 2:
+                        root_index = i
+                        break
             node_idx = len(nodes)
             nodes.append([root_index, None, None])  # 暂时空的左右孩子
             # 将子任务压栈
-            stack.append((root_index + 1, right, node_idx, False))
-            stack.append((left, root_index - 1, node_idx, True))
+            stack.append((root_index + 1, right, node_idx, False, total > 0))
+            stack.append((left, root_index - 1, node_idx, True, total > 0))
 
         if parent_idx is not None and node_idx is not None:
             if is_left:
@@ -41,10 +53,83 @@ def build_all_di_trees(prob_matrix):
         di_trees.append(tree_array)
     return di_trees
 
+def tree_bytes(tree):
+    # 估算一棵数组树的常驻内存：外层 list + 每个 [split, left, right] 节点
+    return sys.getsizeof(tree) + len(tree) * sys.getsizeof([0, 0, 0])
+
+class LazyDiForest:
+    """
+    惰性 Di 树森林：只保存每个位置的稀疏分布（非零区间下标 + 概率），
+    第一次分类到某位置时才构树，并用按字节计的 LRU 缓存淘汰冷树。
+    支持 len() 和下标访问，可直接替代 build_all_di_trees 的返回值。
+    """
+
+    def __init__(self, prob_matrix, cache_bytes=None):
+        prob = np.asarray(prob_matrix, dtype=np.float32)
+        self.num_intervals = prob.shape[1]
+        self.sparse = []
+        for row in prob:
+            idx = np.flatnonzero(row)
+            self.sparse.append((idx.astype(np.int32), row[idx]))
+
+        self.cache_bytes = cache_bytes  # None 表示不限
+        self.cache = OrderedDict()
+        self.resident_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.sparse)
+
+    def __getitem__(self, i):
+        tree = self.cache.get(i)
+        if tree is not None:
+            self.hits += 1
+            self.cache.move_to_end(i)
+            return tree
+
+        self.misses += 1
+        idx, values = self.sparse[i]
+        prob = np.zeros(self.num_intervals, dtype=np.float32)
+        prob[idx] = values
+        tree = build_approximate_bst_array(prob.tolist())
+
+        size = tree_bytes(tree)
+        self.cache[i] = tree
+        self.resident_bytes += size
+        while self.cache_bytes is not None and self.resident_bytes > self.cache_bytes and len(self.cache) > 1:
+            _, cold = self.cache.popitem(last=False)
+            self.resident_bytes -= tree_bytes(cold)
+            self.evictions += 1
+        return tree
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "resident_trees": len(self.cache),
+            "resident_bytes": self.resident_bytes,
+        }
+
+    def __getstate__(self):
+        # 持久化时只保存稀疏分布，缓存与计数器不落盘
+        state = self.__dict__.copy()
+        state["cache"] = OrderedDict()
+        state["resident_bytes"] = 0
+        state["hits"] = state["misses"] = state["evictions"] = 0
+        return state
+
 if __name__ == "__main__":
     n = 10
     training_data = step1.collect_training_data(n)
     v_list = step2.build_v_list(training_data, v_length=n)
     _, prob_matrix = step3.estimate_distributions(training_data, v_list, n)
     di_trees = build_all_di_trees(prob_matrix)
-    print(f"构建了 {len(di_trees)} 棵 Di 树")
\ No newline at end of file
+    print(f"构建了 {len(di_trees)} 棵 Di 树")
+
+    lazy_trees = LazyDiForest(prob_matrix, cache_bytes=4 * tree_bytes(di_trees[0]))
+    for i in list(range(3)) * 2 + list(range(n)):
+        assert lazy_trees[i] == di_trees[i]
+    print("惰性森林统计:", lazy_trees.stats())
\ No newline at end of file
@@ -1,46 +1,157 @@
 import step1, step2, step3, step4
 
+import numpy as np
+
 # 组大小
 GROUP_SIZE = 1  # 如果你有分组的话改为实际值；否则为1（每位独立）
 
-def locate_bucket(x, i, di_trees, v_list):
+def locate_bucket(x, i, di_trees, v_list, group_size=GROUP_SIZE):
     """
     使用数组结构的 Di 树查找元素 x 应该落入的区间。
     每棵树是一个 list，每个节点是 [split_index, left_idx, right_idx]。
+    返回 (k, steps)：k 为满足 v_list[k] <= x 的最大区间号（v_list[0] 为 -inf），
+    steps 为这次下行访问的节点数（即比较次数）。
     """
 
-    mapped_index = i // GROUP_SIZE  # 如果不分组，这里就是 i
+    mapped_index = i // group_size  # 如果不分组，这里就是 i
     tree = di_trees[mapped_index]
 
+    k = 0
+    steps = 0
     idx = 0  # 从根节点（第0个节点）开始
     while idx is not None:
         split_index, left_idx, right_idx = tree[idx]
+        steps += 1
         if x < v_list[split_index]:
             idx = left_idx
         else:
+            k = split_index  # x 不小于该区间下界，记录候选区间后继续向右
             idx = right_idx
-    return split_index
+    return k, steps
 
-def bucket_classify(new_data, di_trees, v_list):
+def bucket_classify(new_data, di_trees, v_list, group_size=GROUP_SIZE):
     """
     输入：
     - new_data: 新的测试数据
     - di_trees: 构建好的轻量数组树
     - v_list: 带边界哨兵的 V-list
+    - group_size: 每棵 Di 树覆盖的相邻位置数
 
     输出：
-    - buckets: 大小为 n+1 的桶列表
+    - buckets: 每个 V-list 区间一个桶（共 len(v_list) - 1 个）
     """
-    n = len(new_data)
-    buckets = [[] for _ in range(n + 1)]
+    num_buckets = len(v_list) - 1
+    buckets = [[] for _ in range(num_buckets)]
 
     for i, x in enumerate(new_data):
-        k = locate_bucket(x, i, di_trees, v_list)
-        k = max(0, min(k, n))  # 防止越界
+        k, _ = locate_bucket(x, i, di_trees, v_list, group_size)
+        k = max(0, min(k, num_buckets - 1))  # 防止越界
         buckets[k].append(x)
 
     return buckets
 
+def bucket_ids(new_data, di_trees, v_list, group_size=GROUP_SIZE):
+    """
+    与 bucket_classify 相同的分类，但只返回每个位置的桶号（int64 数组），
+    不搬运元素本身，便于按下标做 argsort / 记录排序
+    """
+    num_buckets = len(v_list) - 1
+    ids = np.empty(len(new_data), dtype=np.int64)
+
+    for i, x in enumerate(new_data):
+        k, _ = locate_bucket(x, i, di_trees, v_list, group_size)
+        ids[i] = max(0, min(k, num_buckets - 1))  # 防止越界
+
+    return ids
+
+def bucket_ids_guarded(new_data, di_trees, v_list, group_size=GROUP_SIZE, max_steps=None):
+    """
+    与 bucket_ids 相同，但统计 Di 树上的比较次数；
+    累计次数超过 max_steps 时立即放弃，返回 (None, 已用次数)，否则返回 (桶号数组, 已用次数)
+    """
+    num_buckets = len(v_list) - 1
+    ids = np.empty(len(new_data), dtype=np.int64)
+    steps = 0
+
+    for i, x in enumerate(new_data):
+        k, s = locate_bucket(x, i, di_trees, v_list, group_size)
+        steps += s
+        ids[i] = max(0, min(k, num_buckets - 1))
+        if max_steps is not None and steps > max_steps:
+            return None, steps
+
+    return ids, steps
+
+def bucket_ids_global(new_data, v_list):
+    """
+    不使用 Di 树：对整个 V-list 做一次 np.searchsorted，得到与 locate_bucket 相同的区间号。
+    new_data 可以是一维或 (B, n) 的批量数组。
+    """
+    num_buckets = len(v_list) - 1
+    k = np.searchsorted(np.asarray(v_list, dtype=np.float64), np.asarray(new_data, dtype=np.float64),
+                        side="right") - 1
+    return np.clip(k, 0, num_buckets - 1)
+
+def scatter_to_buckets(new_data, ids, num_buckets):
+    # 已知桶号时把元素放进桶列表（与 bucket_classify 的输出格式相同）
+    buckets = [[] for _ in range(num_buckets)]
+    for x, k in zip(new_data, ids.tolist()):
+        buckets[k].append(x)
+    return buckets
+
+def bucket_classify_global(new_data, v_list):
+    return scatter_to_buckets(new_data, bucket_ids_global(new_data, v_list), len(v_list) - 1)
+
+def pack_trees(di_trees):
+    """
+    把数组树森林打包成扁平 int32 数组，供批量分类使用：
+    - split / left / right: 所有节点首尾相接，孩子下标为全局下标，-1 表示空
+    - roots: 每棵树根节点的全局下标
+    """
+    num_trees = len(di_trees)
+    sizes = [len(di_trees[t]) for t in range(num_trees)]
+    total = sum(sizes)
+    split = np.empty(total, dtype=np.int32)
+    left = np.empty(total, dtype=np.int32)
+    right = np.empty(total, dtype=np.int32)
+    roots = np.empty(num_trees, dtype=np.int64)
+
+    offset = 0
+    for t in range(num_trees):
+        roots[t] = offset
+        for j, (split_index, left_idx, right_idx) in enumerate(di_trees[t]):
+            split[offset + j] = split_index
+            left[offset + j] = -1 if left_idx is None else offset + left_idx
+            right[offset + j] = -1 if right_idx is None else offset + right_idx
+        offset += sizes[t]
+    return split, left, right, roots
+
+def bucket_ids_batch(batch, packed, v_list, group_size=GROUP_SIZE):
+    """
+    批量分类：batch 为 (B, n) 数组，所有元素按层同步地沿各自的 Di 树下行，
+    每层只做一次向量化比较。返回 (B, n) 的桶号数组，结果与逐个调用 locate_bucket 相同。
+    """
+    split, left, right, roots = packed
+    batch = np.asarray(batch)  # 保留原 dtype：int64 键与 int64 V-list 直接比较，不经过浮点
+    v = np.asarray(v_list)
+    num_buckets = len(v_list) - 1
+
+    x = batch.ravel()
+    positions = np.tile(np.arange(batch.shape[-1]) // group_size, x.size // max(batch.shape[-1], 1))
+    k = np.zeros(x.size, dtype=np.int64)
+    active = np.arange(x.size)
+    node = roots[positions]
+
+    while active.size:
+        s = split[node]
+        go_left = x[active] < v[s]
+        k[active[~go_left]] = s[~go_left]  # x 不小于区间下界，记录候选区间
+        node = np.where(go_left, left[node], right[node])
+        keep = node >= 0
+        active, node = active[keep], node[keep]
+
+    return np.clip(k, 0, num_buckets - 1).reshape(batch.shape)
+
 if __name__ == "__main__":
     n = 10
     training_data = step1.collect_training_data(n)
@@ -4,19 +4,7 @@ import time
 import tracemalloc
 import random
 import step1, step2, step3, step4, step5
-import sys
-
-sys.setrecursionlimit(100000)  # 解决构树递归深度问题
-
-# --- 插入排序 ---
-def insertion_sort(arr):
-    for i in range(1, len(arr)):
-        key = arr[i]
-        j = i - 1
-        while j >= 0 and arr[j] > key:
-            arr[j + 1] = arr[j]
-            j -= 1
-        arr[j + 1] = key
+from classic_sorters import insertion_sort, get_baselines
 
 # --- 自改进排序主函数（只执行稳态部分） ---
 def self_improving_sort(data, v_list, di_trees):
@@ -28,15 +16,6 @@ def self_improving_sort(data, v_list, di_trees):
         result.extend(bucket)
     return result
 
-# --- 快速排序 ---
-def quicksort(arr):
-    if len(arr) <= 1:
-        return arr
-    pivot = arr[0]
-    less = [x for x in arr[1:] if x < pivot]
-    greater_equal = [x for x in arr[1:] if x >= pivot]
-    return quicksort(less) + [pivot] + quicksort(greater_equal)
-
 # --- 测量时间 + 内存 ---
 def measure_time_memory(func, *args):
     tracemalloc.start()
@@ -71,12 +50,9 @@ def benchmark_algorithms(n, runs=5):
     def data_gen():
         return step1.generate_input(n)
 
-    # ✅ 不再重复训练，复用 v_list 和 di_trees
-    algorithms = [
-        ("自改进排序（稳态）", lambda data: self_improving_sort(data, v_list, di_trees)),
-        ("Python sorted()", lambda data: sorted(data)),
-        ("快速排序", lambda data: quicksort(data))
-    ]
+    # ✅ 不再重复训练，复用 v_list 和 di_trees；对照组统一取自 classic_sorters.BASELINES
+    algorithms = [("自改进排序（稳态）", lambda data: self_improving_sort(data, v_list, di_trees))]
+    algorithms += get_baselines()
 
     print(f"\n[阶段二] 各排序算法（稳态）性能对比：")
     print(f"{'算法':<22} {'平均时间(秒)':<18} {'平均峰值内存(KB)':<20}")
@@ -11,58 +11,8 @@ def load_test_data(filename="test_data.pkl"):
     with open(filename, "rb") as f:
         return pickle.load(f)
 
-# === 插入排序 ===
-def insertion_sort(arr):
-    arr = arr.copy()
-    for i in range(1, len(arr)):
-        key = arr[i]
-        j = i - 1
-        while j >= 0 and arr[j] > key:
-            arr[j + 1] = arr[j]
-            j -= 1
-        arr[j + 1] = key
-    return arr
-
-# === 快速排序 ===
-def quicksort(arr):
-    arr = arr.copy()
-    if len(arr) <= 1:
-        return arr
-    pivot = arr[0]
-    less = [x for x in arr[1:] if x < pivot]
-    greater_equal = [x for x in arr[1:] if x >= pivot]
-    return quicksort(less) + [pivot] + quicksort(greater_equal)
-
-# === 归并排序 ===
-def mergesort(arr):
-    arr = arr.copy()
-    if len(arr) <= 1:
-        return arr
-    mid = len(arr) // 2
-    left = mergesort(arr[:mid])
-    right = mergesort(arr[mid:])
-    return merge(left, right)
-
-def merge(left, right):
-    result = []
-    i = j = 0
-    while i < len(left) and j < len(right):
-        if left[i] <= right[j]:
-            result.append(left[i])
-            i += 1
-        else:
-            result.append(right[j])
-            j += 1
-    result.extend(left[i:])
-    result.extend(right[j:])
-    return result
-
-# === 堆排序 ===
-import heapq
-def heapsort(arr):
-    arr = arr.copy()
-    heapq.heapify(arr)
-    return [heapq.heappop(arr) for _ in range(len(arr))]
+# === 对照组排序：统一取自 classic_sorters（原地、非递归） ===
+from classic_sorters import insertion_sort, get_baselines
 
 # === 自改进排序 ===
 def self_improving_sort(data, v_list, di_trees):
@@ -104,13 +54,8 @@ def test_with_fixed_data(v_list, di_trees, filename="test_data.pkl", runs=3):
     print(f"\n[测试阶段] 使用文件数据：{filename}，运行 {runs} 次")
     original_data = load_test_data(filename)
 
-    algorithms = [
-        ("自改进排序", lambda data: self_improving_sort(data, v_list, di_trees)),
-        ("快速排序", quicksort),
-        ("归并排序", mergesort),
-        ("堆排序", heapsort),
-        ("插入排序", insertion_sort),
-    ]
+    algorithms = [("自改进排序", lambda data: self_improving_sort(data, v_list, di_trees))]
+    algorithms += get_baselines()
 
     print(f"{'算法':<20} {'平均时间(秒)':<18} {'平均峰值内存(KB)':<20}")
     print("-" * 60)
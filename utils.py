@@ -3,9 +3,6 @@
 import random
 import time
 import tracemalloc
-import matplotlib.pyplot as plt
-import seaborn as sns
-import numpy as np
 
 # --- 1. 数据生成 ---
 def generate_input(n, dist_type="piecewise"):
@@ -21,40 +18,14 @@ def generate_input(n, dist_type="piecewise"):
         raise ValueError("Unknown distribution type.")
 
 # --- 2. 排序算法 ---
-def insertion_sort(arr):
-    for i in range(1, len(arr)):
-        key = arr[i]
-        j = i - 1
-        while j >= 0 and arr[j] > key:
-            arr[j + 1] = arr[j]
-            j -= 1
-        arr[j + 1] = key
+# 统一使用 classic_sorters 中原地、非递归的实现；旧接口 merge_sort / heap_sort 返回新的有序 list，不修改输入
+from classic_sorters import insertion_sort, mergesort, heapsort
 
 def merge_sort(arr):
-    if len(arr) <= 1:
-        return arr
-    mid = len(arr) // 2
-    left = merge_sort(arr[:mid])
-    right = merge_sort(arr[mid:])
-    return merge(left, right)
-
-def merge(left, right):
-    result = []
-    i = j = 0
-    while i < len(left) and j < len(right):
-        if left[i] < right[j]:
-            result.append(left[i])
-            i += 1
-        else:
-            result.append(right[j])
-            j += 1
-    result.extend(left[i:])
-    result.extend(right[j:])
-    return result
+    return mergesort(list(arr))
 
 def heap_sort(arr):
-    import heapq
-    return list(heapq.nsmallest(len(arr), arr))
+    return heapsort(list(arr))
 
 # --- 3. 时间和内存测量 ---
 def measure_time_memory(func, *args):
@@ -67,40 +38,12 @@ def measure_time_memory(func, *args):
     return (end - start), (peak / 1024)  # 返回秒和KB
 
 # --- 4. 绘图工具 ---
-def set_plot_style():
-    sns.set_theme(style="whitegrid")
-    plt.rcParams['font.family'] = 'Arial'
-    plt.rcParams['axes.unicode_minus'] = False
-
-
-def plot_bar_chart(x_labels, values, ylabel, title, rotation=45):
-    plt.figure(figsize=(8, 6))
-    sns.barplot(x=x_labels, y=values)
-    plt.ylabel(ylabel)
-    plt.title(title)
-    plt.xticks(rotation=rotation)
-    plt.tight_layout()
-    plt.show()
-
-
-def plot_line_chart(x, ys, labels, ylabel, title):
-    plt.figure(figsize=(8, 6))
-    for y, label in zip(ys, labels):
-        plt.plot(x, y, marker='o', label=label)
-    plt.ylabel(ylabel)
-    plt.title(title)
-    plt.xlabel("Data Size")
-    plt.legend()
-    plt.grid(True)
-    plt.tight_layout()
-    plt.show()
-
-
-def plot_heatmap(matrix, title):
-    plt.figure(figsize=(10, 8))
-    sns.heatmap(matrix, cmap="YlGnBu")
-    plt.title(title)
-    plt.xlabel("Bucket Index")
-    plt.ylabel("Data Index")
-    plt.tight_layout()
-    plt.show()
+# 绘图函数放在 plotting.py，首次访问时才导入 matplotlib / seaborn，
+# 这样只用数据生成和排序的调用方不必承担绘图库的导入开销
+_PLOT_FUNCS = ("set_plot_style", "plot_bar_chart", "plot_line_chart", "plot_heatmap")
+
+def __getattr__(name):
+    if name in _PLOT_FUNCS:
+        import plotting
+        return getattr(plotting, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")